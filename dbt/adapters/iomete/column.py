@@ -1,3 +1,4 @@
+import re
 from dataclasses import dataclass
 from typing import TypeVar, Optional, Dict, Any
 
@@ -6,6 +7,34 @@ from dbt.dataclass_schema import dbtClassMixin
 
 Self = TypeVar('Self', bound='SparkColumn')
 
+# Iceberg type names the catalog metadata may use, and their Spark SQL name as DESCRIBE shows it
+METADATA_TYPE_NAMES = {
+    'long': 'bigint',
+    'integer': 'int',
+    'short': 'smallint',
+    'byte': 'tinyint',
+    'timestamptz': 'timestamp',
+    # Iceberg timestamps without a zone are TIMESTAMP_NTZ in Spark
+    'timestamp': 'timestamp_ntz',
+    'uuid': 'string',
+    'list': 'array',
+}
+
+# not followed by a colon, which would make it the name of a struct field
+METADATA_TYPE_NAME = re.compile(r'\b({})\b(?!\s*:)'.format('|'.join(METADATA_TYPE_NAMES)))
+
+# fixed[16] -> binary
+METADATA_FIXED_TYPE = re.compile(r'\bfixed\s*\[\s*\d+\s*\]')
+
+# decimal(10, 2) -> decimal(10,2), struct<a: int, b: string> -> struct<a:int,b:string>
+TYPE_SEPARATOR_SPACES = re.compile(r'\s*([,:<>()])\s*')
+
+# Spark types whose DESCRIBE spelling the normalized metadata type is known to match
+PRIMITIVE_TYPE = re.compile(
+    r'(boolean|tinyint|smallint|int|bigint|float|double|date|timestamp|timestamp_ntz|string|binary'
+    r'|decimal\(\d+,\d+\))'
+)
+
 
 @dataclass
 class SparkColumn(dbtClassMixin, Column):
@@ -40,21 +69,51 @@ class SparkColumn(dbtClassMixin, Column):
         return "<SparkColumn {} ({})>".format(self.name, self.data_type)
 
     @staticmethod
-    def convert_table_stats(raw_stats: Optional[str]) -> Dict[str, Any]:
-        table_stats = {}
-        if raw_stats:
-            # format: 1109049927 bytes, 14093476 rows
-            stats = {
-                stats.split(" ")[1]: int(stats.split(" ")[0])
-                for stats in raw_stats.split(', ')
-            }
-            for key, val in stats.items():
-                table_stats[f'stats:{key}:label'] = key
-                table_stats[f'stats:{key}:value'] = val
-                table_stats[f'stats:{key}:description'] = ''
-                table_stats[f'stats:{key}:include'] = True
+    def normalize_metadata_type(dtype: str) -> str:
+        """The type of a column in catalog metadata, written the way DESCRIBE writes it"""
+        dtype = dtype.strip().lower()
+        dtype = METADATA_FIXED_TYPE.sub('binary', dtype)
+        dtype = METADATA_TYPE_NAME.sub(lambda match: METADATA_TYPE_NAMES[match.group(1)], dtype)
+        return TYPE_SEPARATOR_SPACES.sub(r'\1', dtype)
+
+    @staticmethod
+    def is_primitive_type(dtype: str) -> bool:
+        """Whether the normalized metadata type `dtype` is one DESCRIBE is known to spell the same way"""
+        return PRIMITIVE_TYPE.fullmatch(dtype) is not None
+
+    @staticmethod
+    def catalog_stat(key: str, label: str, value: Any, description: str = '') -> Dict[str, Any]:
+        """A table statistic in the flattened form of catalog.json"""
+        return {
+            f'stats:{key}:label': label,
+            f'stats:{key}:value': value,
+            f'stats:{key}:description': description,
+            f'stats:{key}:include': True,
+        }
+
+    @classmethod
+    def convert_metadata_stats(cls, statistics: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Catalog stats from `schema_service.table_statistics`"""
+        table_stats: Dict[str, Any] = {}
+        for key, value in (statistics or {}).items():
+            table_stats.update(cls.catalog_stat(key, key, value))
         return table_stats
 
+    @staticmethod
+    def parse_table_stats(raw_stats: Optional[str]) -> Dict[str, int]:
+        """The `Statistics` of DESCRIBE EXTENDED, in the form of `schema_service.table_statistics`"""
+        if not raw_stats:
+            return {}
+        # format: 1109049927 bytes, 14093476 rows
+        return {
+            stats.split(" ")[1]: int(stats.split(" ")[0])
+            for stats in raw_stats.split(', ')
+        }
+
+    @classmethod
+    def convert_table_stats(cls, raw_stats: Optional[str]) -> Dict[str, Any]:
+        return cls.convert_metadata_stats(cls.parse_table_stats(raw_stats))
+
     def to_column_dict(self, omit_none: bool = True, validate: bool = False) -> Dict[str, Any]:
         original_dict = self.to_dict(omit_none=omit_none)
         # If there are stats, merge them into the root of the dict
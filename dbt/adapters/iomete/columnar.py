@@ -0,0 +1,125 @@
+from typing import TYPE_CHECKING, List, NamedTuple, Optional
+
+import agate
+import dbt.exceptions
+from dbt.clients.agate_helper import ISODateTime
+
+if TYPE_CHECKING:
+    from TCLIService import ttypes
+
+# TColumn holds exactly one of these, see TCLIService.thrift
+THRIFT_COLUMN_FIELDS = ('boolVal', 'byteVal', 'i16Val', 'i32Val', 'i64Val', 'doubleVal', 'stringVal', 'binaryVal')
+
+NUMBER_TYPES = {'TINYINT_TYPE', 'SMALLINT_TYPE', 'INT_TYPE', 'BIGINT_TYPE', 'FLOAT_TYPE', 'DOUBLE_TYPE',
+                'DECIMAL_TYPE'}
+
+
+class ColumnarResult(NamedTuple):
+    column_names: List[str]
+    type_codes: List[str]
+    columns: List[list]
+
+    @property
+    def row_count(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+
+def column_values(column: 'ttypes.TColumn') -> list:
+    """Values of a Thrift column with nulls applied, without building rows"""
+    for name in THRIFT_COLUMN_FIELDS:
+        wrapper = getattr(column, name)
+        if wrapper is not None:
+            values = wrapper.values
+            # bit i of the bitmap is set when value i is null, most bytes are 0
+            for i, byte in enumerate(wrapper.nulls or b''):
+                if byte:
+                    for bit in range(8):
+                        if byte & (1 << bit) and i * 8 + bit < len(values):
+                            values[i * 8 + bit] = None
+            return values
+    raise dbt.exceptions.DbtDatabaseError("Got empty column value {}".format(column))
+
+
+def fetch_columns(cursor, fetch_size: int, limit: Optional[int] = None) -> ColumnarResult:
+    """Fetch the remaining result of the pyhive `cursor` column by column.
+
+    pyhive receives the result column-oriented and zips it into row tuples, here
+    the Thrift columns are extended batch by batch instead.
+    """
+    from TCLIService import ttypes
+    from pyhive.hive import TYPES_CONVERTER
+
+    description = cursor.description
+    column_names = [col[0] for col in description]
+    type_codes = [col[1] for col in description]
+    columns: List[list] = [[] for _ in description]
+
+    fetched = 0
+    while limit is None or fetched < limit:
+        # There is no public pyhive API for this, the request is the one pyhive's _fetch_more sends
+        request = ttypes.TFetchResultsReq(
+            operationHandle=cursor._operationHandle,
+            orientation=ttypes.TFetchOrientation.FETCH_NEXT,
+            maxRows=fetch_size if limit is None else min(fetch_size, limit - fetched),
+        )
+        response = cursor._connection.client.FetchResults(request)
+        if response.status.statusCode != ttypes.TStatusCode.SUCCESS_STATUS:
+            raise dbt.exceptions.DbtDatabaseError(response.status.errorMessage)
+
+        batch = response.results.columns or []
+        batch_size = 0
+        for target, column in zip(columns, batch):
+            values = column_values(column)
+            batch_size = len(values)
+            target.extend(values)
+        if batch_size == 0:
+            break
+        fetched += batch_size
+
+    # decimals and timestamps come as strings, converted the same way pyhive does for rows
+    for idx, type_code in enumerate(type_codes):
+        converter = TYPES_CONVERTER.get(type_code)
+        if converter is not None:
+            columns[idx] = [converter(value) if value else value for value in columns[idx]]
+
+    if limit is not None:
+        columns = [column[:limit] for column in columns]
+    return ColumnarResult(column_names, type_codes, columns)
+
+
+def agate_type(type_code: str) -> agate.data_types.DataType:
+    if type_code == 'BOOLEAN_TYPE':
+        return agate.Boolean()
+    if type_code in NUMBER_TYPES:
+        return agate.Number()
+    if type_code == 'TIMESTAMP_TYPE':
+        return ISODateTime()
+    if type_code == 'DATE_TYPE':
+        return agate.Date()
+    # like dbt does for text columns, keep '' and 'null' as they are
+    return agate.Text(cast_nulls=False)
+
+
+def to_agate_table(result: ColumnarResult) -> agate.Table:
+    """Build an agate table with types taken from the result schema instead of testing every value"""
+    column_types = [agate_type(type_code) for type_code in result.type_codes]
+    rows = list(zip(*result.columns)) if result.columns else []
+    return agate.Table(rows, result.column_names, column_types)
+
+
+def to_arrow_table(result: ColumnarResult):
+    """Build a pyarrow table, one array per column"""
+    try:
+        import pyarrow
+    except ImportError:
+        raise dbt.exceptions.DbtRuntimeError(
+            "Arrow results require pyarrow, install it with `pip install dbt-iomete[arrow]`"
+        )
+
+    arrays = []
+    for type_code, values in zip(result.type_codes, result.columns):
+        if type_code == 'DATE_TYPE':
+            arrays.append(pyarrow.array(values, pyarrow.string()).cast(pyarrow.date32()))
+        else:
+            arrays.append(pyarrow.array(values))
+    return pyarrow.Table.from_arrays(arrays, names=result.column_names)
@@ -1,20 +1,30 @@
 from contextlib import contextmanager
 
+import agate
+import dbt.clients.agate_helper
 import dbt.exceptions
 from dbt.adapters.base import Credentials
 from dbt.adapters.sql import SQLConnectionManager
-from dbt.contracts.connection import ConnectionState, AdapterResponse
+from dbt.contracts.connection import Connection, ConnectionState, AdapterResponse
 from dbt.events import AdapterLogger
-from dbt.utils import DECIMALS
+from dbt.events.contextvars import get_node_info
+from dbt.events.functions import fire_event
+from dbt.events.types import SQLQuery
+from dbt.utils import cast_to_str
+from dbt.utils import DECIMALS, JSONEncoder
 
-from TCLIService.ttypes import TOperationState as ThriftState
-from pyhive import hive
+from dbt.adapters.iomete import columnar
+from dbt.adapters.iomete.polling import PollingStrategy
+from dbt.adapters.iomete.retry import RetryPolicy, is_idempotent, retryable_reason
+from dbt.adapters.iomete.session_pool import SessionPool, ThriftSession, conf_value, get_session_pool
 
 from datetime import datetime
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
+import json
+import threading
 import time
 
 logger = AdapterLogger("Spark")
@@ -39,6 +49,30 @@ class SparkCredentials(Credentials):
     connect_timeout: int = 120
     server_side_parameters: Dict[str, Any] = field(default_factory=dict)
     retry_all: bool = False
+    poll_interval: float = 0.1
+    poll_max_interval: float = 5.0
+    poll_backoff_factor: float = 2.0
+    poll_adaptive: bool = False
+    session_pool_size: int = 0
+    session_max_age: int = 3600
+    session_validate_after: int = 30
+    fetch_size: int = 1000
+    columnar_results: bool = False
+    query_timeout: Optional[int] = None
+    warmup: bool = False
+    retry_base_delay: float = 1.0
+    query_retries: int = 2
+    metadata_cache_ttl: int = 300
+    metadata_cache_size: int = 256
+    metadata_concurrency: int = 8
+    persist_metadata_cache: bool = False
+    metadata_streaming: bool = False
+    columns_from_metadata: bool = True
+    telemetry: bool = False
+    seed_staging_location: Optional[str] = None
+    seed_batch_bytes: int = 1000000
+    seed_parallelism: int = 1
+    telemetry_sample_rate: float = 0.1
 
     _ALIASES = {
         'catalog': 'database',
@@ -55,6 +89,9 @@ class SparkCredentials(Credentials):
                 f"The schema should not contain '.': {self.schema}\n"
                 "If you are trying to set a catalog, please use `catalog` instead.\n"
             )
+        if not 0 <= self.telemetry_sample_rate <= 1:
+            raise dbt.exceptions.ValidationError(
+                f"telemetry_sample_rate must be between 0 and 1: {self.telemetry_sample_rate}")
         return
 
     @property
@@ -78,26 +115,61 @@ class PyhiveConnectionWrapper(object):
 
     # https://forums.databricks.com/questions/2157/in-apache-spark-sql-can-we-roll-back-the-transacti.html  # noqa
 
-    def __init__(self, handle):
-        self.handle = handle
+    def __init__(
+            self,
+            session: ThriftSession,
+            polling: Optional[PollingStrategy] = None,
+            pool: Optional[SessionPool] = None,
+            fetch_size: int = 1000,
+            columnar_results: bool = False,
+            query_timeout: Optional[int] = None,
+    ):
+        self.session = session
+        self.handle = session.connection
+        self.polling = polling or PollingStrategy()
+        self.pool = pool
+        self.fetch_size = fetch_size
+        self.columnar_results = columnar_results
+        # seconds a statement may run before it is cancelled, None waits forever
+        self.query_timeout = query_timeout
+        self.poll_count = 0
         self._cursor = None
+        self.last_operation: Optional[OperationHandle] = None
+        self._operations: List[OperationHandle] = []
+        # statements started and not seen finished yet, cancel() may be called from another thread
+        self._in_flight: List[OperationHandle] = []
+        self._in_flight_lock = threading.Lock()
+        self.broken = False
 
     def cursor(self):
-        self._cursor = self.handle.cursor()
+        # the previous operation is done with once a new cursor is requested, closing it
+        # frees the operation on the server, which matters for long-lived pooled sessions
+        self._close_cursor()
+        self._cursor = self.handle.cursor(arraysize=self.fetch_size)
+        self.last_operation = None
         return self
 
     def cancel(self):
-        if self._cursor:
-            # Handle bad response in the pyhive lib when
-            # the connection is cancelled
-            try:
-                self._cursor.cancel()
-            except EnvironmentError as exc:
-                logger.debug(
-                    "Exception while cancelling query: {}".format(exc)
-                )
+        """Cancel every statement of this connection that is still running"""
+        with self._in_flight_lock:
+            operations, self._in_flight = self._in_flight, []
+        for operation in operations:
+            # OperationHandle.cancel handles bad responses of the pyhive lib
+            # when the connection is cancelled
+            operation.cancel()
 
     def close(self):
+        self._close_cursor()
+        for operation in self._operations:
+            operation.close()
+        self._operations = []
+        if self.pool is not None:
+            # hand the session back instead of paying a new OpenSession on the next connection
+            self.pool.release(self.session, broken=self.broken)
+        else:
+            self.handle.close()
+
+    def _close_cursor(self):
         if self._cursor:
             # Handle bad response in the pyhive lib when
             # the connection is cancelled
@@ -107,46 +179,325 @@ class PyhiveConnectionWrapper(object):
                 logger.debug(
                     "Exception while closing cursor: {}".format(exc)
                 )
-        self.handle.close()
+            self._cursor = None
 
     def rollback(self, *args, **kwargs):
         pass
 
     def fetchall(self):
-        return self._cursor.fetchall()
+        return self._count_rows(self._cursor.fetchall())
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._count_rows([row])
+        return row
+
+    def fetchmany(self, size=None):
+        # pyhive only keeps one Thrift fetch (`fetch_size` rows) in memory at a time
+        return self._count_rows(self._cursor.fetchmany(size))
+
+    def _count_rows(self, rows):
+        if self.last_operation is not None:
+            self.last_operation.rows_fetched += len(rows)
+        return rows
+
+    def iter_batches(self, size=None) -> Iterator[List[tuple]]:
+        """Yields the remaining rows in lists of at most `size` (default `fetch_size`) rows"""
+        size = size or self.fetch_size
+        while True:
+            rows = self.fetchmany(size)
+            if not rows:
+                return
+            yield rows
+
+    def __iter__(self):
+        for rows in self.iter_batches():
+            yield from rows
+
+    def fetch_columns(self, limit: Optional[int] = None) -> columnar.ColumnarResult:
+        result = columnar.fetch_columns(self._cursor, self.fetch_size, limit)
+        if self.last_operation is not None:
+            self.last_operation.rows_fetched += result.row_count
+        return result
 
     def execute(self, sql, bindings=None):
+        if self.session.is_redundant(sql):
+            logger.debug("Skipping SET, the value is already in effect: {}".format(sql.strip()))
+            self.poll_count = 0
+            return
+
+        operation = self._start(self._cursor, sql, bindings)
+        self.last_operation = operation
+
+        intervals = self.polling.intervals()
+        with self._session_guard():
+            self._poll(operation)
+            while not operation.done:
+                interval = self._next_interval(intervals, [operation])
+                logger.debug("Poll status: {}, sleeping {:.2f}s".format(operation.state, interval))
+                time.sleep(interval)
+                self._poll(operation)
+
+        self.poll_count = operation.poll_count
+        self._complete(operation)
+
+    def submit(self, sql, bindings=None) -> "OperationHandle":
+        """Start `sql` on the lakehouse and return without waiting for it to finish.
+
+        Operations of one session run concurrently on the lakehouse, collect
+        them with `wait_all` or `as_completed`.
+        """
+        operation = self._start(self.handle.cursor(arraysize=self.fetch_size), sql, bindings)
+        self._operations.append(operation)
+        return operation
+
+    def as_completed(self, operations: List["OperationHandle"]) -> Iterator["OperationHandle"]:
+        """Yields the given operations as they finish, polling all of them in one loop.
+
+        A failed operation raises when it is reached, after the ones still
+        running have been cancelled.
+        """
+        pending = list(operations)
+        intervals = self.polling.intervals()
+        while pending:
+            try:
+                with self._session_guard():
+                    for operation in pending:
+                        if not operation.done:
+                            self._poll(operation)
+
+                finished = [operation for operation in pending if operation.done]
+                pending = [operation for operation in pending if not operation.done]
+                for operation in finished:
+                    try:
+                        self._complete(operation)
+                    finally:
+                        self._close(operation)
+                    yield operation
+            except dbt.exceptions.DbtDatabaseError:
+                for running in pending:
+                    self._cancel(running)
+                raise
+
+            if pending:
+                interval = self._next_interval(intervals, pending)
+                logger.debug("{} operations running, sleeping {:.2f}s".format(len(pending), interval))
+                time.sleep(interval)
+
+    def wait_all(self, operations: List["OperationHandle"]) -> List["OperationHandle"]:
+        for _ in self.as_completed(operations):
+            pass
+        return list(operations)
+
+    def _start(self, cursor, sql, bindings=None) -> "OperationHandle":
         if sql.strip().endswith(";"):
             sql = sql.strip()[:-1]
 
-        # Reaching into the private enumeration here is bad form,
-        # but there doesn't appear to be any way to determine that
-        # a query has completed executing from the pyhive public API.
+        if bindings is not None:
+            bindings = [self._fix_binding(binding) for binding in bindings]
+
         # We need to use an async query + poll here, otherwise our
         # request may be dropped after ~5 minutes by the thrift server
-        STATE_PENDING = [
-            ThriftState.INITIALIZED_STATE,
-            ThriftState.RUNNING_STATE,
-            ThriftState.PENDING_STATE,
-        ]
+        with self._session_guard():
+            cursor.execute(sql, bindings, async_=True)
+        operation = OperationHandle(sql, cursor, self.query_timeout)
+        with self._in_flight_lock:
+            self._in_flight.append(operation)
+        return operation
+
+    def _poll(self, operation: "OperationHandle"):
+        operation.poll()
+        if operation.done:
+            self._forget(operation)
+        elif operation.expired:
+            self._cancel(operation)
+            raise dbt.exceptions.DbtDatabaseError(
+                "Query exceeded query_timeout of {}s and was cancelled".format(operation.timeout))
+
+    def _cancel(self, operation: "OperationHandle"):
+        self._forget(operation)
+        operation.cancel()
+
+    def _close(self, operation: "OperationHandle"):
+        # a finished operation's cursor isn't read again, don't keep it open until the connection closes
+        operation.close()
+        if operation in self._operations:
+            self._operations.remove(operation)
+
+    def _forget(self, operation: "OperationHandle"):
+        with self._in_flight_lock:
+            if operation in self._in_flight:
+                self._in_flight.remove(operation)
+
+    @staticmethod
+    def _next_interval(intervals: Iterator[float], operations: List["OperationHandle"]) -> float:
+        # don't sleep past the earliest deadline
+        interval = next(intervals)
+        remaining = [op.remaining for op in operations if op.remaining is not None]
+        if remaining:
+            interval = max(0.0, min([interval] + remaining))
+        return interval
+
+    def _complete(self, operation: "OperationHandle"):
+        operation.raise_for_state()
+        if not operation.recorded:
+            operation.recorded = True
+            # SETs count whether they ran through execute() or submit()
+            self.session.track(operation.sql)
+            self.polling.record(operation.duration)
+            logger.debug(
+                "Poll status: {}, query {} complete after {} polls, queued {}s, executed {}s".format(
+                    operation.state, operation.query_id, operation.poll_count,
+                    _round(operation.queued_seconds), _round(operation.execution_seconds)))
 
-        STATE_SUCCESS = [
-            ThriftState.FINISHED_STATE,
-        ]
+    @contextmanager
+    def _session_guard(self):
+        # a statement ran through pyhive already, so the Thrift bindings are loaded
+        from thrift.transport.TTransport import TTransportException
+        try:
+            yield
+        except (TTransportException, EOFError, OSError):
+            # the session can't be trusted anymore, don't put it back into the pool
+            self.broken = True
+            raise
 
-        if bindings is not None:
-            bindings = [self._fix_binding(binding) for binding in bindings]
+    @classmethod
+    def _fix_binding(cls, value):
+        """Convert complex datatypes to primitives that can be loaded by
+           the Spark driver"""
+        if isinstance(value, NUMBERS):
+            return float(value)
+        elif isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        else:
+            return value
 
-        self._cursor.execute(sql, bindings, async_=True)
-        poll_state = self._cursor.poll()
-        state = poll_state.operationState
+    @property
+    def description(self):
+        return self._cursor.description
 
-        while state in STATE_PENDING:
-            logger.debug("Poll status: {}, sleeping".format(state))
 
-            poll_state = self._cursor.poll()
-            state = poll_state.operationState
+@dataclass
+class IometeAdapterResponse(AdapterResponse):
+    query_id: Optional[str] = None
+    queued_seconds: Optional[float] = None
+    execution_seconds: Optional[float] = None
+    poll_count: Optional[int] = None
+    rows_fetched: Optional[int] = None
+
+
+class ThriftState:
+    """The values of `TCLIService.ttypes.TOperationState`, fixed by the HiveServer2 protocol.
+
+    Spelled out here so that importing the adapter doesn't import the Thrift
+    bindings, which commands like `dbt parse` never use.
+    """
+    INITIALIZED_STATE = 0
+    RUNNING_STATE = 1
+    FINISHED_STATE = 2
+    CANCELED_STATE = 3
+    CLOSED_STATE = 4
+    ERROR_STATE = 5
+    UKNOWN_STATE = 6
+    PENDING_STATE = 7
+    TIMEDOUT_STATE = 8
+
+    _VALUES_TO_NAMES = {
+        value: name for name, value in locals().items() if name.endswith('_STATE')
+    }
+
+
+# Reaching into the private enumeration here is bad form,
+# but there doesn't appear to be any way to determine that
+# a query has completed executing from the pyhive public API.
+STATE_PENDING = [
+    ThriftState.INITIALIZED_STATE,
+    ThriftState.RUNNING_STATE,
+    ThriftState.PENDING_STATE,
+]
+
+STATE_SUCCESS = [
+    ThriftState.FINISHED_STATE,
+]
+
+STATE_QUEUED = [
+    ThriftState.INITIALIZED_STATE,
+    ThriftState.PENDING_STATE,
+]
+
+
+class OperationHandle(object):
+    """A statement submitted to the lakehouse, with the pyhive cursor that tracks it"""
+
+    def __init__(self, sql, cursor, timeout: Optional[float] = None):
+        self.sql = sql
+        self.cursor = cursor
+        self.timeout = timeout
+        self.started = time.time()
+        self.finished = None
+        self.running_at = None
+        self.poll_count = 0
+        self.poll_state = None
+        self.rows_fetched = 0
+        self.recorded = False
+        self._query_id = None
+
+    @property
+    def state(self):
+        return self.poll_state.operationState if self.poll_state is not None else None
+
+    @property
+    def done(self) -> bool:
+        return self.poll_state is not None and self.state not in STATE_PENDING
+
+    @property
+    def duration(self) -> float:
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the timeout, None without a timeout"""
+        if self.timeout is None:
+            return None
+        return self.started + self.timeout - time.time()
+
+    @property
+    def expired(self) -> bool:
+        return not self.done and self.remaining is not None and self.remaining <= 0
 
+    @property
+    def query_id(self) -> Optional[str]:
+        if self._query_id is not None:
+            return self._query_id
+        handle = getattr(self.cursor, '_operationHandle', None)
+        guid = getattr(getattr(handle, 'operationId', None), 'guid', None)
+        return guid.hex() if isinstance(guid, bytes) else None
+
+    @property
+    def queued_seconds(self) -> Optional[float]:
+        """Time between submission and the first poll that saw the statement out of PENDING"""
+        if self.running_at is None:
+            return None
+        return self.running_at - self.started
+
+    @property
+    def execution_seconds(self) -> Optional[float]:
+        if self.running_at is None or self.finished is None:
+            return None
+        return self.finished - self.running_at
+
+    def poll(self):
+        self.poll_state = self.cursor.poll()
+        self.poll_count += 1
+        now = time.time()
+        if self.running_at is None and self.state not in STATE_QUEUED:
+            self.running_at = now
+        if self.done:
+            self.finished = now
+        return self.poll_state
+
+    def raise_for_state(self):
         # If an errorMessage is present, then raise a database exception
         # with that exact message. If no errorMessage is present, the
         # query did not necessarily succeed: check the state against the
@@ -156,35 +507,37 @@ class PyhiveConnectionWrapper(object):
         # state of the query will be "cancelled". By raising an exception
         # here, we prevent dbt from showing a status of OK when the query
         # has in fact failed.
-        if poll_state.errorMessage:
-            logger.debug("Poll response: {}".format(poll_state))
-            logger.debug("Poll status: {}".format(state))
-            raise dbt.exceptions.DbtDatabaseError(poll_state.errorMessage)
+        if self.poll_state.errorMessage:
+            logger.debug("Poll response: {}".format(self.poll_state))
+            logger.debug("Poll status: {}".format(self.state))
+            raise dbt.exceptions.DbtDatabaseError(self.poll_state.errorMessage)
 
-        elif state not in STATE_SUCCESS:
+        elif self.state not in STATE_SUCCESS:
             status_type = ThriftState._VALUES_TO_NAMES.get(
-                state,
-                'Unknown<{!r}>'.format(state))
+                self.state,
+                'Unknown<{!r}>'.format(self.state))
 
             raise dbt.exceptions.DbtDatabaseError(
                 "Query failed with status: {}".format(status_type))
 
-        logger.debug("Poll status: {}, query complete".format(state))
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        self.rows_fetched += len(rows)
+        return rows
 
-    @classmethod
-    def _fix_binding(cls, value):
-        """Convert complex datatypes to primitives that can be loaded by
-           the Spark driver"""
-        if isinstance(value, NUMBERS):
-            return float(value)
-        elif isinstance(value, datetime):
-            return value.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-        else:
-            return value
+    def cancel(self):
+        try:
+            self.cursor.cancel()
+        except EnvironmentError as exc:
+            logger.debug("Exception while cancelling query: {}".format(exc))
 
-    @property
-    def description(self):
-        return self._cursor.description
+    def close(self):
+        # closing the cursor drops its operation handle
+        self._query_id = self.query_id
+        try:
+            self.cursor.close()
+        except EnvironmentError as exc:
+            logger.debug("Exception while closing cursor: {}".format(exc))
 
 
 class SparkConnectionManager(SQLConnectionManager):
@@ -211,14 +564,176 @@ class SparkConnectionManager(SQLConnectionManager):
     def cancel(self, connection):
         connection.handle.cancel()
 
+    def set_query_timeout(self, timeout: Optional[int]) -> Optional[int]:
+        """Sets the query timeout of this thread's connection, returns the previous one"""
+        handle = self.get_thread_connection().handle
+        previous = handle.query_timeout
+        handle.query_timeout = timeout
+        return previous
+
+    @classmethod
+    def get_result_from_cursor(cls, cursor: Any, limit: Optional[int]) -> agate.Table:
+        # Same table as the default implementation, but rows are pulled in `fetch_size`
+        # batches and go into agate directly, without an intermediate list of dicts
+        if cursor.description is None:
+            return dbt.clients.agate_helper.table_from_data_flat([], [])
+
+        column_names = cls._result_column_names(cursor)
+        if cursor.columnar_results:
+            result = cursor.fetch_columns(limit)._replace(column_names=column_names)
+            return columnar.to_agate_table(result)
+
+        rows: List[list] = []
+        text_only_columns: Set[str] = set()
+        for batch in cursor.iter_batches():
+            if limit:
+                batch = batch[:limit - len(rows)]
+            rows.extend(cls._result_row(row, column_names, text_only_columns) for row in batch)
+            if limit and len(rows) >= limit:
+                break
+
+        return dbt.clients.agate_helper.table_from_rows(
+            rows=rows, column_names=column_names, text_only_columns=text_only_columns
+        )
+
+    def submit(self, sql: str, bindings: Optional[Any] = None) -> OperationHandle:
+        """Starts `sql` on this thread's session without waiting for it to finish"""
+        connection = self.get_thread_connection()
+        sql = self._add_query_comment(sql)
+        fire_event(
+            SQLQuery(conn_name=cast_to_str(connection.name), sql=sql, node_info=get_node_info())
+        )
+        with self.exception_handler(sql):
+            return connection.handle.submit(sql, bindings)
+
+    def as_completed(self, operations: List[OperationHandle]) -> Iterator[OperationHandle]:
+        connection = self.get_thread_connection()
+        with self.exception_handler("\n;\n".join(operation.sql for operation in operations)):
+            yield from connection.handle.as_completed(operations)
+
+    def wait_all(self, operations: List[OperationHandle]) -> List[AdapterResponse]:
+        for _ in self.as_completed(operations):
+            pass
+        return [self.get_response(operation) for operation in operations]
+
+    def execute_arrow(self, sql: str, limit: Optional[int] = None):
+        """Runs `sql` and returns its result as a pyarrow table, built column by column"""
+        sql = self._add_query_comment(sql)
+        _, cursor = self.add_query(sql, auto_begin=False)
+        if cursor.description is None:
+            return columnar.to_arrow_table(columnar.ColumnarResult([], [], []))
+        column_names = self._result_column_names(cursor)
+        return columnar.to_arrow_table(cursor.fetch_columns(limit)._replace(column_names=column_names))
+
+    def execute_batches(self, sql: str, batch_size: Optional[int] = None) -> Iterator[agate.Table]:
+        """Runs `sql` and yields its result as agate tables of at most `batch_size` rows,
+        so callers can process big results with bounded memory"""
+        sql = self._add_query_comment(sql)
+        _, cursor = self.add_query(sql, auto_begin=False)
+        if cursor.description is None:
+            return
+
+        column_names = self._result_column_names(cursor)
+        for batch in cursor.iter_batches(batch_size):
+            text_only_columns: Set[str] = set()
+            rows = [self._result_row(row, column_names, text_only_columns) for row in batch]
+            yield dbt.clients.agate_helper.table_from_rows(
+                rows=rows, column_names=column_names, text_only_columns=text_only_columns
+            )
+
+    @staticmethod
+    def _result_column_names(cursor: Any) -> List[str]:
+        # duplicate names get a suffix, like in SQLConnectionManager.process_results
+        column_names: List[str] = []
+        seen: Dict[str, int] = {}
+        for col in cursor.description:
+            name = col[0]
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}_{seen[name]}"
+            else:
+                seen[name] = 1
+            column_names.append(name)
+        return column_names
+
+    @staticmethod
+    def _result_row(row: Sequence[Any], column_names: List[str], text_only_columns: Set[str]) -> list:
+        values = []
+        for col_name, value in zip(column_names, row):
+            if isinstance(value, (dict, list, tuple)):
+                # Represent container types as json strings
+                value = json.dumps(value, cls=JSONEncoder)
+                text_only_columns.add(col_name)
+            elif isinstance(value, str):
+                text_only_columns.add(col_name)
+            values.append(value)
+        return values
+
     @classmethod
     def get_response(cls, cursor) -> AdapterResponse:
         # https://github.com/dbt-labs/dbt-spark/issues/142
         message = 'OK'
-        return AdapterResponse(
-            _message=message
+        # either the connection wrapper or a submitted OperationHandle
+        operation = getattr(cursor, 'last_operation', cursor)
+        if not isinstance(operation, OperationHandle):
+            return IometeAdapterResponse(_message=message)
+
+        return IometeAdapterResponse(
+            _message=message,
+            query_id=operation.query_id,
+            queued_seconds=_round(operation.queued_seconds),
+            execution_seconds=_round(operation.execution_seconds),
+            poll_count=operation.poll_count,
+            rows_fetched=operation.rows_fetched,
         )
 
+    def execute(
+            self, sql: str, auto_begin: bool = False, fetch: bool = False, limit: Optional[int] = None
+    ) -> Tuple[AdapterResponse, agate.Table]:
+        sql = self._add_query_comment(sql)
+        _, cursor = self.add_query(sql, auto_begin)
+        if fetch:
+            table = self.get_result_from_cursor(cursor, limit)
+        else:
+            table = dbt.clients.agate_helper.empty_table()
+        # the response is built after fetching, so it includes the fetched rows
+        return self.get_response(cursor), table
+
+    def add_query(
+            self,
+            sql: str,
+            auto_begin: bool = True,
+            bindings: Optional[Any] = None,
+            abridge_sql_log: bool = False,
+    ) -> Tuple[Connection, Any]:
+        connection = self.get_thread_connection()
+        if not is_idempotent(sql):
+            # DDL/DML might have been applied before the error, running it again is not safe
+            return super().add_query(sql, auto_begin, bindings, abridge_sql_log)
+
+        delays = RetryPolicy.for_queries(connection.credentials).delays()
+        while True:
+            try:
+                return super().add_query(sql, auto_begin, bindings, abridge_sql_log)
+            except Exception as exc:
+                # exception_handler replaces the original error, which is kept as the context
+                original = exc.__context__ if isinstance(exc, dbt.exceptions.DbtRuntimeError) else exc
+                reason = retryable_reason(original or exc)
+                delay = next(delays, None) if reason else None
+                if delay is None:
+                    raise
+                logger.warning(f"Warning: {reason}\n\tRetrying query in {delay:.1f} seconds")
+                time.sleep(delay)
+                if connection.handle.broken:
+                    # the session is gone, continue on a new one with the same query timeout,
+                    # and the confs the model set (spark_conf, pre-hooks) on the old one
+                    query_timeout = connection.handle.query_timeout
+                    conf = dict(connection.handle.session.conf)
+                    self.close(connection)
+                    self.open(connection)
+                    connection.handle.query_timeout = query_timeout
+                    connection.handle.session.restore(conf)
+
     # No transactions on Spark....
     def add_begin_query(self, *args, **kwargs):
         pass
@@ -250,21 +765,22 @@ class SparkConnectionManager(SQLConnectionManager):
 
         creds = connection.credentials
         exc = None
+        handle = None
+        delays = RetryPolicy.for_connections(creds).delays()
 
         for i in range(1 + creds.connect_retries):
             try:
                 cls.validate_creds(creds, ['host', 'port', 'user', 'token', 'lakehouse', 'dataplane'])
-                conn = hive.connect(
-                    scheme=creds.scheme,
-                    host=creds.host,
-                    port=creds.port,
-                    lakehouse=creds.lakehouse,
-                    database=creds.database,
-                    username=creds.user,
-                    password=creds.token,
-                    data_plane=creds.dataplane
+                pool = cls.get_session_pool(creds)
+                if pool is not None:
+                    pool.prefill_once(pool.size)
+                    session = pool.acquire()
+                else:
+                    session = ThriftSession(cls._connect(creds), cls._session_conf(creds))
+                handle = PyhiveConnectionWrapper(
+                    session, PollingStrategy.from_credentials(creds), pool,
+                    creds.fetch_size, creds.columnar_results, creds.query_timeout
                 )
-                handle = PyhiveConnectionWrapper(conn)
                 break
             except Exception as e:
                 exc = e
@@ -274,44 +790,106 @@ class SparkConnectionManager(SQLConnectionManager):
                     msg = 'Failed to connect. Make sure lakehouse is in non-terminated state ' \
                           'and credentials (user/password) are correct'
                     raise dbt.exceptions.FailedToConnectError(msg) from e
-                retryable_message = _is_retryable_error(e)
+                retryable_message = retryable_reason(e)
                 if retryable_message and creds.connect_retries > 0:
-                    msg = (
-                        f"Warning: {retryable_message}\n\tRetrying in "
-                        f"{creds.connect_timeout} seconds "
-                        f"({i} of {creds.connect_retries})"
-                    )
-                    logger.warning(msg)
-                    time.sleep(creds.connect_timeout)
+                    reason = retryable_message
                 elif creds.retry_all and creds.connect_retries > 0:
-                    msg = (
-                        f"Warning: {getattr(exc, 'message', 'No message')}, "
+                    reason = (
+                        f"{getattr(exc, 'message', 'No message')}, "
                         f"retrying due to 'retry_all' configuration "
-                        f"set to true.\n\tRetrying in "
-                        f"{creds.connect_timeout} seconds "
-                        f"({i} of {creds.connect_retries})"
+                        f"set to true."
                     )
-                    logger.warning(msg)
-                    time.sleep(creds.connect_timeout)
                 else:
                     raise dbt.exceptions.FailedToConnectError(
                         'Failed to connect! Make sure host, port, protocol (https/http) is correct!'
                     ) from e
-        else:
+
+                delay = next(delays, None)
+                if delay is None:
+                    break
+                msg = (
+                    f"Warning: {reason}\n\tRetrying in "
+                    f"{delay:.1f} seconds "
+                    f"({i + 1} of {creds.connect_retries})"
+                )
+                logger.warning(msg)
+                time.sleep(delay)
+
+        if handle is None:
             raise exc
 
         connection.handle = handle
         connection.state = ConnectionState.OPEN
         return connection
 
+    @classmethod
+    def _connect(cls, creds):
+        from pyhive import hive
+
+        return hive.connect(
+            scheme=creds.scheme,
+            host=creds.host,
+            port=creds.port,
+            lakehouse=creds.lakehouse,
+            database=creds.database,
+            username=creds.user,
+            password=creds.token,
+            data_plane=creds.dataplane,
+            configuration=cls._session_conf(creds),
+        )
+
+    @staticmethod
+    def _session_conf(creds) -> Dict[str, str]:
+        return {key: conf_value(value) for key, value in creds.server_side_parameters.items()}
+
+    def get_session_conf(self, key: str) -> Optional[str]:
+        """The value of a Spark conf in this thread's session, None if it is not known"""
+        return self.get_thread_connection().handle.session.conf.get(key)
 
-def _is_retryable_error(exc: Exception) -> Optional[str]:
-    message = getattr(exc, 'message', None)
-    if message is None:
-        return None
-    message = message.lower()
-    if 'pending' in message:
-        return exc.message
-    if 'temporarily_unavailable' in message:
-        return exc.message
-    return None
+    @classmethod
+    def get_session_pool(cls, creds) -> Optional[SessionPool]:
+        """The process-wide pool of sessions for `creds`, None if `session_pool_size` is 0"""
+        if creds.session_pool_size <= 0:
+            return None
+        # sessions run `USE <catalog>` as the given user on open, so those are part of the key
+        key = (creds.unique_field, creds.user, creds.database)
+        return get_session_pool(key, lambda: SessionPool(
+            connect=lambda: cls._connect(creds),
+            size=creds.session_pool_size,
+            max_age=creds.session_max_age,
+            validate_after=creds.session_validate_after,
+            conf=cls._session_conf(creds),
+        ))
+
+
+def warm_up(creds, threads: int):
+    """Wait until the lakehouse answers a query, and with a session pool open up to `threads` sessions.
+
+    Runs in the background while dbt parses and compiles. With `session_pool_size`
+    set, the sessions go into the pool SparkConnectionManager.open takes them from.
+    Without it, the `select 1` runs on a session that is closed afterwards, so
+    warm-up doesn't turn pooling on.
+    """
+    start = time.time()
+    try:
+        pool = SparkConnectionManager.get_session_pool(creds)
+        if pool is not None:
+            pool.prefill_once(threads)
+            handle = PyhiveConnectionWrapper(pool.acquire(), pool=pool)
+        else:
+            handle = PyhiveConnectionWrapper(ThriftSession(
+                SparkConnectionManager._connect(creds), SparkConnectionManager._session_conf(creds)))
+        try:
+            # a cold lakehouse starts resuming on the first statement
+            handle.cursor().execute("select 1")
+        finally:
+            handle.close()
+        ready = pool.idle_count() if pool is not None else 0
+        logger.debug("Warm-up: lakehouse ready after {:.2f}s, {} pooled sessions".format(time.time() - start, ready))
+    except Exception as exc:
+        # the run opens its connections as usual, and reports the error there
+        logger.debug("Warm-up failed after {:.2f}s: {}".format(time.time() - start, exc))
+
+
+def _round(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds, 3) if seconds is not None else None
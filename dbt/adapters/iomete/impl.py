@@ -1,29 +1,41 @@
-from concurrent.futures import Future
+import hashlib
+import json
+import os
+import re
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Optional, List, Dict, Any, Union, Iterable, Type
+from typing import Optional, List, Dict, Any, Union, Iterable, Iterator, Mapping, Set, Tuple, Type
 import agate
 from dbt.contracts.connection import AdapterResponse
+from dbt.contracts.graph.manifest import Manifest
 from dbt.contracts.relation import RelationType
 from dbt.context.exceptions_jinja import raise_compiler_error
 
 import dbt
 import dbt.exceptions
 
-from dbt.adapters.base import AdapterConfig, PythonJobHelper
+from dbt.adapters.base import AdapterConfig, PythonJobHelper, available
 from dbt.adapters.base.impl import catch_as_completed
 from dbt.adapters.sql import SQLAdapter
 from dbt.adapters.iomete import SparkConnectionManager
+from dbt.adapters.iomete.connections import warm_up
 from dbt.adapters.iomete import SparkRelation
 from dbt.adapters.iomete import SparkColumn
 from dbt.adapters.base import BaseRelation
 from dbt.clients.agate_helper import DEFAULT_TYPE_TESTER
 from dbt_common.utils import AttrDict
 from dbt.events import AdapterLogger
+from dbt.flags import get_flags
 from dbt.utils import executor
-import sentry_sdk
 
+from dbt.adapters.iomete import seed_batches, seed_staging
+from dbt.adapters.iomete.__version__ import version
 from dbt.adapters.iomete.python_job import IometeSparkJobHelper
-from dbt.adapters.iomete.schema_service import SchemaService
+from dbt.adapters.iomete.schema_service import SchemaService, table_statistics
+from dbt.adapters.iomete.session_pool import conf_value
+from dbt.adapters.iomete.telemetry import init_telemetry
 
 logger = AdapterLogger("iomete")
 
@@ -33,16 +45,28 @@ GET_COLUMNS_IN_RELATION_RAW_MACRO_NAME = "get_columns_in_relation_raw"
 
 KEY_TABLE_OWNER = 'Owner'
 KEY_TABLE_STATISTICS = 'Statistics'
+KEY_TABLE_PROVIDER = 'Provider'
+KEY_TABLE_LOCATION = 'Location'
+KEY_TABLE_PROPERTIES = 'Table Properties'
 
-sentry_sdk.init(
-    dsn="https://a1424d21130340e4913bd8bc1b228c12@o1140336.ingest.sentry.io/4504214031695872",
+# section headers of DESCRIBE EXTENDED after the columns
+SECTION_PARTITIONS = ('# Partition Information', '# Partitioning')
+SECTION_TABLE_INFORMATION = '# Detailed Table Information'
 
-    # Set traces_sample_rate to 1.0 to capture 100%
-    # of transactions for performance monitoring.
-    # We recommend adjusting this value in production.
-    traces_sample_rate=1.0,
-    attach_stacktrace=True
-)
+# `[k1=v1, k2=v2]`, values may contain ', '
+TABLE_PROPERTY_SEPARATOR = re.compile(r', (?=[\w.\-]+=)')
+
+# keys of the column type in the catalog metadata of a column
+METADATA_TYPE_KEYS = ('type', 'dataType', 'data_type')
+
+# schema API responses kept between invocations, inside the target directory
+METADATA_CACHE_DIR = 'iomete_metadata'
+
+# suffix of the table that parallel seed batches are loaded into before the seed
+SEED_STAGING_SUFFIX = '__dbt_seed_staging'
+
+# commands that run statements on the lakehouse, and so benefit from warm sessions
+WARMUP_COMMANDS = {'run', 'build', 'seed', 'snapshot', 'test'}
 
 
 @dataclass
@@ -54,6 +78,9 @@ class SparkConfig(AdapterConfig):
     buckets: Optional[int] = None
     options: Optional[Dict[str, str]] = None
     merge_update_columns: Optional[str] = None
+    statement_concurrency: Optional[int] = None
+    query_timeout: Optional[int] = None
+    spark_conf: Optional[Dict[str, Any]] = None
 
 
 class SparkAdapter(SQLAdapter):
@@ -64,7 +91,55 @@ class SparkAdapter(SQLAdapter):
 
     def __init__(self, config):
         super().__init__(config)
-        self.schema_service = SchemaService(credentials=config.credentials)
+        cache_dir = None
+        if config.credentials.persist_metadata_cache:
+            cache_dir = os.path.join(config.project_root, config.target_path, METADATA_CACHE_DIR)
+        self.schema_service = SchemaService(credentials=config.credentials, cache_dir=cache_dir)
+        # relations created or altered in this run, their columns come from DESCRIBE
+        self._changed_relations: Set[Tuple[Optional[str], Optional[str], Optional[str]]] = set()
+        # columns looked up in this run, until a statement changes the relation; and whether they were described
+        self._columns: Dict[Tuple[Optional[str], Optional[str], Optional[str]], Tuple[List[SparkColumn], bool]] = {}
+        self._columns_lock = threading.Lock()
+        self._column_cache_hits = 0
+        self._describes_saved = 0
+        # what DESCRIBE EXTENDED told about the relations described in this run
+        self._table_information: Dict[Tuple[Optional[str], Optional[str], Optional[str]], Dict[str, Any]] = {}
+        # column types of the seeds loaded in this run, per column_types override
+        self._seed_types: "weakref.WeakKeyDictionary[agate.Table, Dict[Tuple, List[str]]]" = weakref.WeakKeyDictionary()
+        # namespaces of each catalog, listed once per run and kept up to date by create/drop schema
+        self._namespaces: Dict[Optional[str], Set[str]] = {}
+        self._namespaces_lock = threading.Lock()
+        if config.credentials.telemetry:
+            init_telemetry(config.credentials.telemetry_sample_rate)
+        if config.credentials.warmup and getattr(get_flags(), 'WHICH', None) in WARMUP_COMMANDS:
+            threading.Thread(
+                target=warm_up, args=(config.credentials, config.threads), name="iomete-warmup", daemon=True
+            ).start()
+
+    def pre_model_hook(self, config: Mapping[str, Any]) -> Any:
+        context = {}
+        timeout = config.get('query_timeout')
+        if timeout is not None:
+            # without it, the profile's query_timeout stays
+            context['query_timeout'] = self.connections.set_query_timeout(timeout)
+
+        spark_conf = config.get('spark_conf') or {}
+        if spark_conf:
+            context['spark_conf'] = {key: self.connections.get_session_conf(key) for key in spark_conf}
+            for key, value in spark_conf.items():
+                # skipped by the connection if the session already has this value
+                self.execute(f"set {key} = {conf_value(value)}")
+        return context
+
+    def post_model_hook(self, config: Mapping[str, Any], context: Any) -> None:
+        if 'query_timeout' in context:
+            self.connections.set_query_timeout(context['query_timeout'])
+
+        for key, previous in context.get('spark_conf', {}).items():
+            if previous is None:
+                self.execute(f"reset {key}")
+            else:
+                self.execute(f"set {key} = {previous}")
 
     @classmethod
     def date_function(cls) -> str:
@@ -91,34 +166,259 @@ class SparkAdapter(SQLAdapter):
     def convert_datetime_type(cls, agate_table, col_idx):
         return "timestamp"
 
+    @available
+    def get_seed_column_types(
+            self, agate_table: agate.Table, column_types: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """The type of every column of a seed: the `column_types` config, or the type inferred from the values.
+
+        Inferring a number type reads the whole column, so it is done once per seed
+        for both the create table and the inserts, and not for overridden columns.
+        """
+        column_types = column_types or {}
+        key = tuple(sorted(column_types.items()))
+        with self._columns_lock:
+            types = self._seed_types.get(agate_table, {}).get(key)
+        if types is None:
+            types = [
+                column_types[name] if name in column_types else self.convert_type(agate_table, idx)
+                for idx, name in enumerate(agate_table.column_names)
+            ]
+            with self._columns_lock:
+                self._seed_types.setdefault(agate_table, {})[key] = types
+        return types
+
+    @available
+    def get_seed_hash(self, model: Mapping[str, Any]) -> Optional[str]:
+        """Hash of the seed's CSV file and config, None if the file can't be read"""
+        path = os.path.join(model['root_path'], model['original_file_path'])
+        digest = hashlib.sha256()
+        try:
+            with open(path, 'rb') as csv_file:
+                for chunk in iter(lambda: csv_file.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        except OSError as exc:
+            logger.debug("Could not hash seed {}: {}".format(path, exc))
+            return None
+        # any config change reloads the seed, e.g. column_types, quote_columns or file_format
+        digest.update(json.dumps(model.get('config', {}), sort_keys=True, default=str).encode('utf-8'))
+        digest.update(version.encode('utf-8'))
+        return digest.hexdigest()
+
+    @available
+    def load_seed_from_staging(
+            self, relation: BaseRelation, agate_table: agate.Table, column_types: List[str]
+    ) -> str:
+        """Load the seed with one `insert into ... select` from a Parquet file staged in
+        `seed_staging_location`. Returns the statement, or '' without a staging location."""
+        location = self.config.credentials.seed_staging_location
+        if not location:
+            return ""
+        name = "{}_{}".format(relation.schema, relation.identifier)
+        with seed_staging.staged_parquet(agate_table, column_types, location, name) as uri:
+            sql = seed_staging.insert_sql(relation, agate_table.column_names, column_types, uri)
+            self.connections.execute(sql)
+        return sql
+
+    @available
+    def insert_seed_rows(
+            self, relation: BaseRelation, agate_table: agate.Table, column_types: List[str], max_batch_size: int
+    ) -> str:
+        """Insert the seed in `insert into ... values` batches sized to `seed_batch_bytes`.
+        Returns the first statement, for the compiled output.
+        """
+        row_sql = seed_batches.row_sql(column_types)
+        chunks = self._seed_batches(agate_table, row_sql, max_batch_size)
+        if not chunks:
+            return seed_batches.insert_sql(relation, row_sql, 1)
+        for chunk in chunks:
+            self._insert_seed_batch(relation, row_sql, chunk)
+        return seed_batches.insert_sql(relation, row_sql, len(chunks[0]))
+
+    @available
+    def stage_seed_rows(
+            self, relation: BaseRelation, agate_table: agate.Table, column_types: List[str], max_batch_size: int,
+            file_format: Optional[str] = None, location_root: Optional[str] = None,
+            quote_columns: Optional[bool] = None,
+    ) -> Optional[BaseRelation]:
+        """With `seed_parallelism` above 1, insert the seed's batches concurrently into a
+        staging table with the seed's columns, `file_format` and `location_root`, and
+        return it. The seed itself is only reset once every batch is in, and then
+        filled from the staging table by `copy_seed_from_staging`, so a failed batch
+        leaves it as it was.
+
+        Returns None when the rows are inserted by `insert_seed_rows` instead.
+        """
+        credentials = self.config.credentials
+        if credentials.seed_parallelism <= 1 or credentials.seed_staging_location:
+            return None
+        row_sql = seed_batches.row_sql(column_types)
+        chunks = self._seed_batches(agate_table, row_sql, max_batch_size)
+        parallelism = min(credentials.seed_parallelism, len(chunks))
+        if parallelism <= 1:
+            return None
+
+        staging = relation.incorporate(path={"identifier": relation.identifier + SEED_STAGING_SUFFIX})
+        columns = [self.quote_seed_column(str(name), quote_columns) for name in agate_table.column_names]
+        self.connections.execute("drop table if exists {}".format(staging.render()))
+        self.connections.execute(
+            seed_batches.staging_table_sql(staging, columns, column_types, file_format, location_root))
+        try:
+            self._insert_seed_batches_concurrently(relation, staging, row_sql, chunks, parallelism)
+        except BaseException:
+            self.connections.execute("drop table if exists {}".format(staging.render()))
+            raise
+        return staging
+
+    @available
+    def copy_seed_from_staging(self, relation: BaseRelation, staging: BaseRelation) -> str:
+        """Fill the (reset) seed from the staging table of `stage_seed_rows`, and drop it"""
+        sql = "insert into {} select * from {}".format(relation.render(), staging.render())
+        try:
+            self.connections.execute(sql)
+        finally:
+            self.connections.execute("drop table if exists {}".format(staging.render()))
+        return sql
+
+    def _seed_batches(self, agate_table: agate.Table, row_sql: str, max_batch_size: int) -> list:
+        size = seed_batches.batch_size(agate_table, row_sql, self.config.credentials.seed_batch_bytes, max_batch_size)
+        return list(seed_batches.batches(agate_table.rows, size))
+
+    def _insert_seed_batch(self, relation: BaseRelation, row_sql: str, chunk):
+        sql = seed_batches.insert_sql(relation, row_sql, len(chunk))
+        self.connections.add_query(sql, bindings=seed_batches.bindings(chunk), abridge_sql_log=True)
+
+    def _insert_seed_batches_concurrently(
+            self, relation: BaseRelation, staging: BaseRelation, row_sql: str, chunks: list, parallelism: int,
+    ):
+        failed = threading.Event()
+
+        def insert(worker):
+            # one connection per worker, so a session is opened per worker rather than per batch
+            try:
+                with self.connection_named("{}_batch_{}".format(relation.identifier, worker)):
+                    for chunk in chunks[worker::parallelism]:
+                        if failed.is_set():
+                            return
+                        self._insert_seed_batch(staging, row_sql, chunk)
+            except BaseException:
+                failed.set()
+                raise
+
+        with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="iomete-seed") as tpe:
+            futures = [tpe.submit(insert, worker) for worker in range(parallelism)]
+        for future in futures:
+            future.result()
+
     def quote(self, identifier):
         return '`{}`'.format(identifier)
 
+    def _relations_cache_for_schemas(
+            self, manifest: Manifest, cache_schemas: Optional[Set[BaseRelation]] = None
+    ) -> None:
+        # Listings come from the schema API, not from SQL, so unlike the default
+        # implementation no dbt connection (and Thrift session) is opened per schema,
+        # and the number of concurrent requests is independent of `threads`
+        if not cache_schemas:
+            cache_schemas = self._get_cache_schemas(manifest)
+
+        concurrency = max(1, min(self.config.credentials.metadata_concurrency, len(cache_schemas)))
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="iomete-metadata") as tpe:
+            futures = [tpe.submit(self.list_relations_without_caching, schema) for schema in cache_schemas]
+            for future in as_completed(futures):
+                for relation in future.result():
+                    self.cache.add(relation)
+
+        # namespaces without relations are cached as well, so they aren't listed again
+        self.cache.update_schemas({
+            (relation.database, relation.schema) for relation in cache_schemas if relation.schema
+        })
+
     def list_relations_without_caching(
             self, schema_relation: SparkRelation
     ) -> List[SparkRelation]:
-        tables = self.schema_service.get_tables_by_namespace(schema_relation.database, schema_relation.schema)
-
-        relations = []
-        for table in tables:
-            rel_type = RelationType.Table
-            if table['type'] and table['type'].lower() == 'view':
-                rel_type = RelationType.View
-
-            provider = table['provider'].lower() if table['provider'] else None
-
-            relation = self.Relation.create(
-                database=table['catalog'],
-                schema=table['namespace'],
-                identifier=table['name'],
-                type=rel_type,
-                provider=provider,
-                is_iceberg=provider == "iceberg",
-                table_fields=table["columns"],
-            )
-            relations.append(relation)
+        # relations are built while the listing is read, so the listing is never held as a whole
+        tables = self.schema_service.iter_tables_by_namespace(schema_relation.database, schema_relation.schema)
+        return [self._relation_from_table(table) for table in tables]
+
+    def _relation_from_table(self, table: dict) -> SparkRelation:
+        rel_type = RelationType.Table
+        if table['type'] and table['type'].lower() == 'view':
+            rel_type = RelationType.View
+
+        provider = table['provider'].lower() if table['provider'] else None
+
+        return self.Relation.create(
+            database=table['catalog'],
+            schema=table['namespace'],
+            identifier=table['name'],
+            type=rel_type,
+            provider=provider,
+            is_iceberg=provider == "iceberg",
+            table_fields=table["columns"],
+            owner=table.get('owner'),
+            table_stats=table_statistics(table),
+            properties=table['properties'] if isinstance(table.get('properties'), dict) else None,
+        )
+
+    @available
+    def cache_added(self, relation: Optional[BaseRelation]) -> str:
+        result = super().cache_added(relation)
+        self._invalidate_metadata(relation)
+        return result
+
+    @available
+    def cache_dropped(self, relation: Optional[BaseRelation]) -> str:
+        result = super().cache_dropped(relation)
+        self._invalidate_metadata(relation)
+        return result
+
+    @available
+    def cache_renamed(self, from_relation: Optional[BaseRelation], to_relation: Optional[BaseRelation]) -> str:
+        result = super().cache_renamed(from_relation, to_relation)
+        self._invalidate_metadata(from_relation)
+        self._invalidate_metadata(to_relation)
+        return result
+
+    def _invalidate_metadata(self, relation: BaseRelation):
+        # the next listing of the namespace has to come from the API again,
+        # and the columns cached with the relation don't apply anymore
+        key = self._relation_key(relation)
+        self._changed_relations.add(key)
+        with self._columns_lock:
+            self._columns.pop(key, None)
+            self._table_information.pop(key, None)
+        if relation.database and relation.schema:
+            self.schema_service.invalidate(relation.database, relation.schema)
+
+    @available
+    def execute_batches(self, sql: str, batch_size: Optional[int] = None) -> Iterator[agate.Table]:
+        """Run `sql` and yield the result as agate tables of at most `batch_size` rows.
+
+        Unlike `run_query`, only one batch is held in memory at a time, e.g.:
+        {% for batch in adapter.execute_batches('select * from big_lookup', 10000) %} ... {% endfor %}
+        """
+        return self.connections.execute_batches(sql, batch_size)
 
-        return relations
+    @available
+    def submit_query(self, sql: str):
+        """Start `sql` without waiting for it, returns a handle for `wait_all` / `as_completed`"""
+        return self.connections.submit(sql)
+
+    @available
+    def wait_all(self, handles: List[Any]) -> List[AdapterResponse]:
+        """Wait for all submitted statements, raising the first failure"""
+        return self.connections.wait_all(handles)
+
+    @available
+    def as_completed(self, handles: List[Any]) -> Iterator[Any]:
+        """Yield submitted statements in the order they finish"""
+        return self.connections.as_completed(handles)
+
+    @available
+    def execute_arrow(self, sql: str, limit: Optional[int] = None):
+        """Run `sql` and return the result as a pyarrow table (requires the `arrow` extra)"""
+        return self.connections.execute_arrow(sql, limit)
 
     def get_relation(
             self, database: str, schema: str, identifier: str
@@ -129,16 +429,168 @@ class SparkAdapter(SQLAdapter):
         return super().get_relation(database, schema, identifier)
 
     def get_columns_in_relation(self, relation: Relation) -> List[SparkColumn]:
+        key = self._relation_key(relation)
+        with self._columns_lock:
+            cached = self._columns.get(key)
+            if cached is not None:
+                columns, described = cached
+                self._column_cache_hits += 1
+                self._describes_saved += described
+                return list(columns)
+
+        columns, described = self._get_columns(relation)
+        with self._columns_lock:
+            self._columns[key] = (columns, described)
+        return list(columns)
+
+    def _get_columns(self, relation: Relation) -> Tuple[List[SparkColumn], bool]:
         is_temp_table = relation.schema is None and relation.identifier.endswith("tmp")
         if is_temp_table:
-            return self._get_columns_of_temp_table(relation)
+            return self._get_columns_of_temp_table(relation), True
+
+        columns = self._get_columns_from_metadata(relation)
+        if columns is not None:
+            return columns, False
 
+        return self._describe(relation), True
+
+    def _describe(self, relation: Relation) -> List[SparkColumn]:
         rows: AttrDict = self.execute_macro(
             GET_COLUMNS_IN_RELATION_RAW_MACRO_NAME, kwargs={"relation": relation}
         )
-        columns = self.parse_describe_extended(relation, rows)
+        columns, information = self._parse_describe_extended(relation, rows)
+        with self._columns_lock:
+            self._table_information[self._relation_key(relation)] = information
         return columns
 
+    @available
+    def describe_relation(self, relation: Relation) -> SparkRelation:
+        """`relation` with the provider, owner, location, statistics, partitioning and table properties
+        of its DESCRIBE EXTENDED, which runs at most once per run unless the relation changes"""
+        key = self._relation_key(relation)
+        with self._columns_lock:
+            information = self._table_information.get(key)
+        if information is None:
+            columns = self._describe(relation)
+            with self._columns_lock:
+                self._columns[key] = (columns, True)
+                information = self._table_information[key]
+        # e.g. views have no provider, keep what the relation already knows
+        return relation.incorporate(**{key: value for key, value in information.items() if value is not None})
+
+    @available
+    def get_table_properties(self, relation: Relation) -> Dict[str, str]:
+        """The tblproperties of `relation`, without a `SHOW TBLPROPERTIES`: from the namespace
+        listing when it has them and the relation wasn't changed since, else from DESCRIBE EXTENDED"""
+        if relation.properties is not None and self._relation_key(relation) not in self._changed_relations:
+            return dict(relation.properties)
+        return dict(self.describe_relation(relation).properties or {})
+
+    def column_cache_stats(self) -> Dict[str, int]:
+        with self._columns_lock:
+            return {'hits': self._column_cache_hits, 'describes_saved': self._describes_saved,
+                    'size': len(self._columns)}
+
+    def cleanup_connections(self) -> None:
+        stats = self.column_cache_stats()
+        if stats['hits']:
+            logger.debug("Column cache answered {hits} lookups, saving {describes_saved} describes".format(**stats))
+        stats = self.schema_service.cache_stats()
+        if stats['hits'] or stats['misses']:
+            logger.debug("Schema metadata cache: {hits} hits, {misses} misses, {evictions} evictions, "
+                         "{size} entries".format(**stats))
+        super().cleanup_connections()
+
+    def _get_columns_from_metadata(self, relation: Relation) -> Optional[List[SparkColumn]]:
+        """Columns from the catalog metadata, or None if DESCRIBE has to answer"""
+        if not self.config.credentials.columns_from_metadata:
+            return None
+        if self._relation_key(relation) in self._changed_relations:
+            return None
+
+        fields, provider, owner, statistics = (
+            relation.table_fields, relation.provider, relation.owner, relation.table_stats)
+        if fields is None:
+            cached = self._get_cached_relation(relation)
+            if cached is not None:
+                fields, provider, owner, statistics = (
+                    cached.table_fields, cached.provider, cached.owner, cached.table_stats)
+        if fields is None:
+            table = self.schema_service.get_table(relation.database, relation.schema, relation.identifier)
+            if table:
+                fields, provider, owner, statistics = (
+                    table.get('columns'), table.get('provider'), table.get('owner'), table_statistics(table))
+        if not fields:
+            return None
+        if not provider or provider.lower() != 'iceberg':
+            # the metadata of other tables (and views) may use Spark's spelling, where e.g. `timestamp`
+            # is not the Iceberg one, so the type names can't be mapped
+            logger.debug(f"{relation} is not an Iceberg table, falling back to describe")
+            return None
+        table_stats = SparkColumn.convert_metadata_stats(statistics) or None
+
+        columns = []
+        for idx, field in enumerate(fields):
+            name = field.get('name')
+            dtype = next((field[key] for key in METADATA_TYPE_KEYS if field.get(key) is not None), None)
+            if not isinstance(name, str) or not isinstance(dtype, str):
+                # e.g. nested types as JSON, DESCRIBE renders them
+                logger.debug(f"Unexpected column metadata for {relation}, falling back to describe: {field}")
+                return None
+            dtype = SparkColumn.normalize_metadata_type(dtype)
+            if not SparkColumn.is_primitive_type(dtype):
+                # e.g. nested types, whose spelling may differ from DESCRIBE's and show up as a type change
+                logger.debug(f"Column {name} of {relation} has type {dtype}, falling back to describe")
+                return None
+            columns.append(SparkColumn(
+                table_database=relation.database,
+                table_schema=relation.schema,
+                table_name=relation.name,
+                table_type=relation.type,
+                table_owner=owner,
+                table_stats=table_stats,
+                column=name,
+                column_index=idx,
+                dtype=dtype,
+            ))
+        return columns
+
+    def _get_cached_relation(self, relation: Relation) -> Optional[SparkRelation]:
+        identifier = relation.identifier.lower()
+        for cached in self.cache.get_relations(relation.database, relation.schema):
+            if cached.identifier.lower() == identifier:
+                return cached
+        return None
+
+    @available
+    def mark_schema_changed(self, relation: Optional[BaseRelation]) -> str:
+        """Called by macros that create or alter `relation`: its cached columns are outdated"""
+        if relation is not None:
+            self._invalidate_metadata(relation)
+        return ""
+
+    @available
+    def cache_schema_created(self, relation: BaseRelation) -> str:
+        """Called by `iomete__create_schema`, so `check_schema_exists` doesn't list the namespaces again"""
+        with self._namespaces_lock:
+            namespaces = self._namespaces.get(relation.database)
+            if namespaces is not None:
+                namespaces.add(relation.schema)
+        return ""
+
+    @available
+    def cache_schema_dropped(self, relation: BaseRelation) -> str:
+        with self._namespaces_lock:
+            namespaces = self._namespaces.get(relation.database)
+            if namespaces is not None:
+                namespaces.discard(relation.schema)
+        return ""
+
+    @staticmethod
+    def _relation_key(relation: BaseRelation) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        parts = (relation.database, relation.schema, relation.identifier)
+        return tuple(part.lower() if part else part for part in parts)
+
     def _get_columns_of_temp_table(self, relation: Relation) -> List[SparkColumn]:
         try:
             desc_table_columns = self.execute_macro(
@@ -169,11 +621,15 @@ class SparkAdapter(SQLAdapter):
     def _get_columns_for_catalog(
             self, relation: SparkRelation
     ) -> Iterable[Dict[str, Any]]:
+        # the relations come from the namespace listing, so in the common case the
+        # columns do too, and only relations without usable metadata are described
         columns = self.get_columns_in_relation(relation)
 
         for column in columns:
             # convert SparkColumns into catalog dicts
             as_dict = column.to_column_dict()
+            if relation.provider:
+                as_dict.update(SparkColumn.catalog_stat('provider', 'Provider', relation.provider))
             as_dict['column_name'] = as_dict.pop('column', None)
             as_dict['column_type'] = as_dict.pop('dtype')
             as_dict['table_database'] = column.table_database
@@ -214,13 +670,19 @@ class SparkAdapter(SQLAdapter):
         )
 
     def check_schema_exists(self, database, schema):
+        with self._namespaces_lock:
+            namespaces = self._namespaces.get(database)
+            if namespaces is not None:
+                return schema in namespaces
+
         results = self.execute_macro(
             LIST_SCHEMAS_MACRO_NAME,
             kwargs={'database': database}
         )
-
-        exists = True if schema in [row[0] for row in results] else False
-        return exists
+        with self._namespaces_lock:
+            # another thread may have listed them meanwhile, and created or dropped one since
+            namespaces = self._namespaces.setdefault(database, {row[0] for row in results})
+            return schema in namespaces
 
     def get_rows_different_sql(
             self,
@@ -253,28 +715,87 @@ class SparkAdapter(SQLAdapter):
     def parse_describe_extended(
         self, relation: BaseRelation, raw_rows: AttrDict
     ) -> List[SparkColumn]:
-        # Convert the Row to a dict
-        dict_rows = [dict(zip(row._keys, row._values)) for row in raw_rows]
-        # Find the separator between the rows and the metadata provided
-        # by the DESCRIBE TABLE EXTENDED statement
-        pos = self.find_table_information_separator(dict_rows)
-
-        # Remove rows that start with a hash, they are comments
-        rows = [row for row in raw_rows[0:pos] if not row["col_name"].startswith("#")]
-        return [
+        return self._parse_describe_extended(relation, raw_rows)[0]
+
+    def _parse_describe_extended(
+        self, relation: BaseRelation, raw_rows: AttrDict
+    ) -> Tuple[List[SparkColumn], Dict[str, Any]]:
+        """The columns of DESCRIBE EXTENDED and its table information, in one pass over the rows.
+
+        The columns come first and end at the first blank or `#` row. The sections
+        after them are the partitioning and the table information, the latter as
+        `key | value` rows.
+        """
+        column_rows = []
+        partition_by = []
+        metadata = {}
+        section = 'columns'
+        for row in raw_rows:
+            name, value = row[0], row[1]
+            if section == 'columns':
+                if name and not name.startswith('#'):
+                    column_rows.append((name, value))
+                    continue
+                section = None
+            if not name:
+                continue
+            if name.startswith('#'):
+                if name in SECTION_PARTITIONS:
+                    section = 'partitions'
+                elif name == SECTION_TABLE_INFORMATION:
+                    section = 'table information'
+                elif section != 'partitions' or name != '# col_name':
+                    section = None
+            elif section == 'partitions':
+                # Hive partitions list the columns, Iceberg lists `Part 0 | days(ts)`
+                partition_by.append(value if name.startswith('Part ') and value else name)
+            elif section == 'table information':
+                metadata[name] = value
+
+        provider = metadata.get(KEY_TABLE_PROVIDER)
+        provider = provider.lower() if provider else None
+        information = {
+            'provider': provider,
+            'is_iceberg': provider == 'iceberg' if provider else None,
+            'owner': metadata.get(KEY_TABLE_OWNER),
+            'location': metadata.get(KEY_TABLE_LOCATION),
+            'table_stats': SparkColumn.parse_table_stats(metadata.get(KEY_TABLE_STATISTICS)) or None,
+            'partition_by': partition_by,
+            'properties': self._parse_table_properties(metadata.get(KEY_TABLE_PROPERTIES)),
+        }
+
+        # the relation keeps the statistics as they are, columns have them in the catalog's form
+        table_stats = SparkColumn.convert_metadata_stats(information['table_stats']) or None
+        columns = [
             SparkColumn(
                 table_database=relation.database,
                 table_schema=relation.schema,
                 table_name=relation.name,
                 table_type=relation.type,
-                table_owner=None,
-                table_stats=None,
-                column=column["col_name"],
+                table_owner=information['owner'],
+                table_stats=table_stats,
+                column=name,
                 column_index=idx,
-                dtype=column["data_type"],
+                dtype=dtype,
             )
-            for idx, column in enumerate(rows)
+            for idx, (name, dtype) in enumerate(column_rows)
         ]
+        return columns, information
+
+    @staticmethod
+    def _parse_table_properties(raw_properties: Optional[str]) -> Dict[str, str]:
+        # format: [format=iceberg/parquet, format-version=2]
+        if not raw_properties:
+            return {}
+        raw_properties = raw_properties.strip()
+        if raw_properties.startswith('[') and raw_properties.endswith(']'):
+            raw_properties = raw_properties[1:-1]
+        properties = {}
+        for prop in TABLE_PROPERTY_SEPARATOR.split(raw_properties):
+            key, _, value = prop.partition('=')
+            if key:
+                properties[key.strip()] = value.strip()
+        return properties
 
     @property
     def python_submission_helpers(self) -> Dict[str, Type[PythonJobHelper]]:
@@ -296,11 +817,7 @@ class SparkAdapter(SQLAdapter):
         try:
             cursor.execute(sql)
             if fetch == "one":
-                if hasattr(cursor, "fetchone"):
-                    return cursor.fetchone()
-                else:
-                    # AttributeError: 'PyhiveConnectionWrapper' object has no attribute 'fetchone'
-                    return cursor.fetchall()[0]
+                return cursor.fetchone()
             elif fetch == "all":
                 return cursor.fetchall()
             else:
@@ -312,15 +829,6 @@ class SparkAdapter(SQLAdapter):
         finally:
             conn.transaction_open = False
 
-    @staticmethod
-    def find_table_information_separator(rows: List[dict]) -> int:
-        pos = 0
-        for row in rows:
-            if not row["col_name"] or row["col_name"].startswith("#"):
-                break
-            pos += 1
-        return pos
-
 
 # spark does something interesting with joins when both tables have the same
 # static values for the join condition and complains that the join condition is
@@ -0,0 +1,127 @@
+import json
+import re
+from typing import Any, Iterable, Iterator
+
+WHITESPACE = ' \t\n\r'
+
+# the characters that can end an element, depending on where the scan is
+CONTAINER_TOKENS = re.compile(r'[\[\]{}"]')
+STRING_TOKENS = re.compile(r'["\\]')
+SCALAR_END = re.compile(r'[ \t\n\r,\]]')
+
+
+class _ElementScanner:
+    """Finds where the element at the start of the buffer ends, resuming from where the
+    previous scan stopped so that every character is only looked at once"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.scanned = 0
+        self.depth = 0
+        self.in_string = False
+
+    def find_end(self, buffer: str, start: int):
+        """The end of the element starting at `start`, or None if it isn't in `buffer` yet"""
+        idx = start + self.scanned
+        if self.scanned == 0:
+            char = buffer[start]
+            if char == '"':
+                self.in_string = True
+            elif char in '[{':
+                self.depth = 1
+            idx += 1
+        while True:
+            if self.in_string:
+                match = STRING_TOKENS.search(buffer, idx)
+            elif self.depth:
+                match = CONTAINER_TOKENS.search(buffer, idx)
+            else:
+                match = SCALAR_END.search(buffer, idx)
+            if match is None:
+                self.scanned = len(buffer) - start
+                return None
+            idx = match.start()
+            char = buffer[idx]
+            if self.in_string:
+                if char == '\\':
+                    if idx + 1 == len(buffer):
+                        # the escaped character is in the next chunk
+                        self.scanned = idx - start
+                        return None
+                    idx += 2
+                    continue
+                self.in_string = False
+                idx += 1
+                if not self.depth:
+                    return idx
+            elif self.depth:
+                idx += 1
+                if char == '"':
+                    self.in_string = True
+                elif char in '[{':
+                    self.depth += 1
+                else:
+                    self.depth -= 1
+                    if not self.depth:
+                        return idx
+            else:
+                return idx
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[Any]:
+    """Yields the elements of a JSON array read from text `chunks`, one at a time.
+
+    Only the element being decoded is buffered, so memory doesn't grow with
+    the size of the array. An element is only decoded once its end has been
+    read, so one spanning many chunks is still decoded once. Built on
+    `json.JSONDecoder.raw_decode`, no extra dependency needed.
+    """
+    decoder = json.JSONDecoder()
+    scanner = _ElementScanner()
+    chunks = iter(chunks)
+    buffer = ''
+    position = 0
+    started = False
+
+    def read_more() -> bool:
+        nonlocal buffer, position
+        for chunk in chunks:
+            if chunk:
+                # drop what has been decoded already
+                buffer = buffer[position:] + chunk
+                position = 0
+                return True
+        return False
+
+    while True:
+        while position < len(buffer) and buffer[position] in WHITESPACE:
+            position += 1
+        if position == len(buffer):
+            if not read_more():
+                if started:
+                    raise ValueError("Unterminated JSON array")
+                return
+            continue
+
+        char = buffer[position]
+        if not started:
+            if char != '[':
+                raise ValueError("Expected a JSON array, got {!r}".format(buffer[position:position + 20]))
+            started = True
+            position += 1
+            continue
+        if char == ']':
+            return
+        if char == ',':
+            position += 1
+            continue
+
+        if scanner.find_end(buffer, position) is None:
+            if read_more():
+                continue
+            raise ValueError("Unterminated JSON array")
+        scanner.reset()
+        value, position = decoder.raw_decode(buffer, position)
+        yield value
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# what `get` returns for keys that are not cached, a cached None means "not found"
+MISSING = object()
+
+
+class MetadataCache:
+    """Thread-safe LRU cache of schema API responses, with entries expiring after `ttl` seconds.
+
+    Keys are `(catalog, namespace, path)` tuples, so all entries of a namespace
+    can be invalidated when the adapter changes a relation in it.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 300, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, key: Tuple[str, str, str]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+
+    def put(self, key: Tuple[str, str, str], value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, catalog: str, namespace: str):
+        """Drop every entry of the namespace"""
+        with self._lock:
+            for key in [key for key in self._entries if key[:2] == (catalog, namespace)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self._entries)}
+
+
+_CACHES: Dict[Hashable, MetadataCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_metadata_cache(key: Hashable, create: Callable[[], MetadataCache]) -> MetadataCache:
+    """Returns the process-wide cache for `key`, so chained invocations of dbt in one process share it"""
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = _CACHES[key] = create()
+        return cache
+
+
+class ResponseStore:
+    """Schema API responses persisted in a directory (under `target/`) with their validators,
+    so the next dbt invocation can revalidate them with a conditional request.
+
+    Responses of a namespace share a subdirectory, which is removed to invalidate them.
+    A file holds a line of JSON with the validators, followed by the response body as it
+    was received, so loading doesn't parse the body.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def load(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), encoding='utf-8') as file:
+                entry = json.loads(file.readline())
+                entry['body'] = file.read()
+                return entry
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key: Tuple[str, str, str], etag: Optional[str], last_modified: Optional[str], body: str):
+        if etag is None and last_modified is None:
+            # nothing to revalidate with
+            return
+        directory = self._namespace_directory(key[0], key[1])
+        os.makedirs(directory, exist_ok=True)
+        # write and rename, so concurrent invocations never read half a file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump({'etag': etag, 'last_modified': last_modified}, file)
+                file.write('\n')
+                file.write(body)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def invalidate(self, catalog: str, namespace: str):
+        shutil.rmtree(self._namespace_directory(catalog, namespace), ignore_errors=True)
+
+    def _namespace_directory(self, catalog: str, namespace: str) -> str:
+        return os.path.join(self.directory, _digest(catalog, namespace))
+
+    def _path(self, key: Tuple[str, str, str]) -> str:
+        return os.path.join(self._namespace_directory(key[0], key[1]), f"{_digest(key[2])}.json")
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha1('/'.join(parts).encode('utf-8')).hexdigest()
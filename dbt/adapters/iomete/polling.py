@@ -0,0 +1,93 @@
+import threading
+from collections import deque
+from typing import Deque, Iterator, Optional
+
+# how many finished statements are remembered when adapting the poll interval
+DURATION_HISTORY_SIZE = 50
+
+# when adapting, start polling at this fraction of the typical statement duration
+ADAPTIVE_INTERVAL_RATIO = 0.1
+
+
+class StatementDurations:
+    """Thread-safe record of how long recent statements took in this run"""
+
+    def __init__(self, size: int = DURATION_HISTORY_SIZE):
+        self._durations: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, duration: float):
+        with self._lock:
+            self._durations.append(duration)
+
+    def median(self) -> Optional[float]:
+        with self._lock:
+            if not self._durations:
+                return None
+            ordered = sorted(self._durations)
+        return ordered[len(ordered) // 2]
+
+    def clear(self):
+        with self._lock:
+            self._durations.clear()
+
+
+# shared by every connection of the process, i.e. one dbt invocation
+STATEMENT_DURATIONS = StatementDurations()
+
+
+class PollingStrategy:
+    """Decides how long to sleep between two `GetOperationStatus` calls.
+
+    The interval starts at `initial_interval` and grows by `backoff_factor`
+    after every poll until it reaches `max_interval`. With `adaptive` on, the
+    first interval is derived from the median duration of the statements
+    that already finished in this run, so long MERGEs don't start with a burst
+    of short polls.
+    """
+
+    def __init__(
+            self,
+            initial_interval: float = 0.1,
+            max_interval: float = 5.0,
+            backoff_factor: float = 2.0,
+            adaptive: bool = False,
+            durations: StatementDurations = STATEMENT_DURATIONS,
+    ):
+        if initial_interval < 0 or max_interval < 0:
+            raise ValueError("Poll intervals must not be negative")
+        if backoff_factor < 1:
+            raise ValueError("Poll backoff factor must be at least 1")
+        self.initial_interval = initial_interval
+        self.max_interval = max(initial_interval, max_interval)
+        self.backoff_factor = backoff_factor
+        self.adaptive = adaptive
+        self.durations = durations
+
+    @classmethod
+    def from_credentials(cls, credentials) -> "PollingStrategy":
+        return cls(
+            initial_interval=credentials.poll_interval,
+            max_interval=credentials.poll_max_interval,
+            backoff_factor=credentials.poll_backoff_factor,
+            adaptive=credentials.poll_adaptive,
+        )
+
+    def first_interval(self) -> float:
+        if self.adaptive:
+            median = self.durations.median()
+            if median is not None:
+                adapted = median * ADAPTIVE_INTERVAL_RATIO
+                return min(self.max_interval, max(self.initial_interval, adapted))
+        return self.initial_interval
+
+    def intervals(self) -> Iterator[float]:
+        """Yields the sleep before each successive poll of one statement"""
+        interval = self.first_interval()
+        while True:
+            yield interval
+            interval = min(self.max_interval, interval * self.backoff_factor)
+
+    def record(self, duration: float):
+        if self.adaptive:
+            self.durations.record(duration)
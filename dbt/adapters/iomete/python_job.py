@@ -8,8 +8,6 @@ from dbt.adapters.base import PythonJobHelper
 from dbt.adapters.iomete import SparkCredentials
 from dbt.events import AdapterLogger
 
-from iomete_sdk.spark import SparkJobApiClient
-
 POLLING_PERIOD_SECONDS = 10
 DEFAULT_TIMEOUT = 60 * 60 * 24
 
@@ -18,6 +16,8 @@ logger = AdapterLogger("iomete")
 
 class IometeSparkJobHelper(PythonJobHelper):
     def __init__(self, parsed_model: Dict, credential: SparkCredentials) -> None:
+        from iomete_sdk.spark import SparkJobApiClient
+
         self.parsed_model = parsed_model
         self.alias = parsed_model["alias"]
         self.schema = parsed_model["schema"]
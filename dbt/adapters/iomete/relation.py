@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from dataclasses import dataclass, field
 
@@ -27,3 +27,9 @@ class SparkRelation(BaseRelation):
     is_iceberg: Optional[bool] = None
     describe_table_rows: str = None
     table_fields: list = None
+    owner: Optional[str] = None
+    table_stats: Optional[Dict[str, Any]] = None
+    # from the table information of DESCRIBE EXTENDED, see SparkAdapter.describe_relation
+    location: Optional[str] = None
+    partition_by: Optional[List[str]] = None
+    properties: Optional[Dict[str, str]] = None
@@ -0,0 +1,115 @@
+import random
+import re
+from typing import Callable, Iterator, Optional
+
+# lower-cased fragments of error messages the lakehouse (or the load balancer in front
+# of it) returns while it is starting, scaling or briefly unreachable
+RETRYABLE_MESSAGES = (
+    'pending',
+    'temporarily_unavailable',
+    'service unavailable',
+    'bad gateway',
+    'gateway timeout',
+    'too many requests',
+    'connection reset',
+    'connection refused',
+    'timed out',
+)
+
+RETRYABLE_STATUS_CODES = re.compile(r'\b(429|502|503|504)\b')
+
+# statements that only read, so running them twice has the same effect as running them once.
+# `with` isn't one of them, the statement after the CTEs may be an insert or a merge
+IDEMPOTENT_KEYWORDS = {'select', 'show', 'describe', 'desc', 'explain'}
+
+COMMENTS = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+
+# parentheses, quoted strings and identifiers, and words of a statement
+SQL_TOKEN = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|[()]|[^\s()'\"`,]+|,")
+
+
+def retryable_reason(exc: BaseException) -> Optional[str]:
+    """Returns why `exc` is worth retrying, or None if retrying won't help"""
+    from thrift.transport.TTransport import TTransportException
+
+    if isinstance(exc, TTransportException):
+        return "Transport error: {}".format(exc)
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return "Connection error: {}".format(exc)
+
+    message = getattr(exc, 'message', None)
+    if not isinstance(message, str):
+        message = str(exc)
+    lowered = message.lower()
+    if any(fragment in lowered for fragment in RETRYABLE_MESSAGES):
+        return message
+    if RETRYABLE_STATUS_CODES.search(lowered):
+        return message
+    return None
+
+
+def is_idempotent(sql: str) -> bool:
+    """True for statements that are safe to run again after a failure: queries and metadata lookups"""
+    sql = COMMENTS.sub(' ', sql).lstrip(' \t\r\n(')
+    words = sql.split(None, 1)
+    if not words:
+        return False
+    if words[0].lower() == 'with':
+        return _statement_after_ctes(sql) in ('select', '(')
+    return words[0].lower() in IDEMPOTENT_KEYWORDS
+
+
+def _statement_after_ctes(sql: str) -> Optional[str]:
+    """The first token after the CTEs of the `with` statement `sql`, lower-cased.
+
+    A CTE ends with a parenthesized query, which is followed by a comma and the next
+    CTE, or by the statement. A parenthesized column list is followed by `as`.
+    """
+    depth = 0
+    closed = False
+    for token in SQL_TOKEN.findall(sql):
+        if depth == 0 and closed and token.lower() not in (',', 'as'):
+            return token.lower()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        closed = token == ')' and depth == 0
+    return None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    The n-th retry waits a random time between 0 and
+    `min(max_delay, base_delay * 2 ** n)`, so threads that failed together
+    don't retry together.
+    """
+
+    def __init__(
+            self,
+            retries: int,
+            base_delay: float = 1.0,
+            max_delay: float = 120.0,
+            random_uniform: Callable[[float, float], float] = random.uniform,
+    ):
+        if retries < 0:
+            raise ValueError("Retries must not be negative")
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._uniform = random_uniform
+
+    @classmethod
+    def for_connections(cls, credentials) -> "RetryPolicy":
+        # connect_timeout used to be the fixed sleep between attempts, now it caps the backoff
+        return cls(credentials.connect_retries, credentials.retry_base_delay, credentials.connect_timeout)
+
+    @classmethod
+    def for_queries(cls, credentials) -> "RetryPolicy":
+        return cls(credentials.query_retries, credentials.retry_base_delay, credentials.connect_timeout)
+
+    def delays(self) -> Iterator[float]:
+        """Yields the sleep before each of the `retries` retries"""
+        for attempt in range(self.retries):
+            yield self._uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
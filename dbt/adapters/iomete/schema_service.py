@@ -1,43 +1,165 @@
-import requests
 import json
-from typing import Optional
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Tuple
 from dbt.context.exceptions_jinja import raise_compiler_error
-from requests.adapters import HTTPAdapter
-from urllib3 import Retry
+
+from dbt.adapters.iomete.json_stream import iter_json_array
+from dbt.adapters.iomete.metadata_cache import MISSING, MetadataCache, ResponseStore, get_metadata_cache
+
+# characters decoded at a time from a streamed listing
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# where the table metadata may hold each statistic: its own keys, or the Iceberg snapshot summary
+STATISTICS_KEYS = {
+    'bytes': ('sizeInBytes', 'totalSize', 'total-files-size', 'bytes'),
+    'rows': ('rowCount', 'numRows', 'total-records', 'rows'),
+    'files': ('numFiles', 'fileCount', 'total-data-files', 'files'),
+    'last_modified': ('lastModified', 'lastModifiedAt', 'lastUpdated', 'updatedAt'),
+}
+STATISTICS_CONTAINERS = ('statistics', 'stats', 'summary', 'properties')
+
+
+def table_statistics(table: dict) -> Dict[str, Any]:
+    """Size, row count, file count and last modification of a table in the schema API metadata"""
+    sources = [table] + [table[key] for key in STATISTICS_CONTAINERS if isinstance(table.get(key), dict)]
+    statistics: Dict[str, Any] = {}
+    for name, keys in STATISTICS_KEYS.items():
+        value = next((source[key] for source in sources for key in keys if source.get(key) is not None), None)
+        if value is None:
+            continue
+        if name == 'last_modified':
+            statistics[name] = _timestamp(value)
+        else:
+            try:
+                statistics[name] = int(value)
+            except (TypeError, ValueError):
+                continue
+    return statistics
+
+
+def _timestamp(value: Any) -> str:
+    # epoch milliseconds (or seconds) become ISO 8601, anything else is kept as the API wrote it
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+        seconds = float(value)
+        if seconds > 1e11:
+            seconds /= 1000
+        return datetime.fromtimestamp(seconds, tz=timezone.utc).isoformat()
+    return str(value)
 
 
 class SchemaService:
-    def __init__(self, credentials):
+    def __init__(self, credentials, cache_dir: Optional[str] = None):
         self.credentials = credentials
+        # responses kept across invocations and revalidated with conditional requests
+        self.store = ResponseStore(cache_dir) if cache_dir else None
+
+        self._session = None
+        self._session_lock = threading.Lock()
+
+        # the same user sees the same metadata, across the invocations in this process
+        cache_key = (credentials.scheme, credentials.host, credentials.port, credentials.domain, credentials.user)
+        self.cache = get_metadata_cache(cache_key, lambda: MetadataCache(
+            max_size=credentials.metadata_cache_size,
+            ttl=credentials.metadata_cache_ttl,
+        ))
 
-        adapter = HTTPAdapter(max_retries=Retry(total=3, backoff_factor=0.5, allowed_methods=None,
-                                                status_forcelist=[429, 500, 502, 503, 504]))
-        self.session = requests.Session()
-        self.session.mount(credentials.scheme, adapter)
+    @property
+    def session(self):
+        """The HTTP session, created on first use so that commands which never ask for metadata
+        don't import requests"""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+                from urllib3 import Retry
+
+                # one pooled HTTP connection per concurrent namespace listing
+                adapter = HTTPAdapter(max_retries=Retry(total=3, backoff_factor=0.5, allowed_methods=None,
+                                                        status_forcelist=[429, 500, 502, 503, 504]),
+                                      pool_maxsize=max(DEFAULT_POOLSIZE, self.credentials.metadata_concurrency))
+                self._session = requests.Session()
+                self._session.mount(self.credentials.scheme, adapter)
+            return self._session
 
     def get_tables_by_namespace(self, database: str, schema: str) -> list:
         return self._get_namespaces(
             database=database,
-            path=f"{schema}/tables?includeMetadata=true",
+            schema=schema,
+            path="tables?includeMetadata=true",
             error_message=f"Could not get tables for schema {database}.{schema}") or []
 
+    def iter_tables_by_namespace(self, database: str, schema: str) -> Iterator[dict]:
+        """Like `get_tables_by_namespace`, but with `metadata_streaming` the listing is parsed
+        while it is downloaded, one table at a time, instead of being loaded as a whole"""
+        if not self.credentials.metadata_streaming:
+            yield from self.get_tables_by_namespace(database, schema)
+            return
+
+        key = (database.lower(), schema.lower(), "tables?includeMetadata=true")
+        cached = self.cache.get(key)
+        if cached is not MISSING:
+            yield from cached or []
+            return
+
+        import requests
+
+        # streamed listings are not cached, keeping them would hold the whole namespace in memory again
+        error_message = f"Could not get tables for schema {database}.{schema}"
+        response = self._send(database, f"{schema}/{key[2]}", error_message, stream=True)
+        if response is None:
+            return
+        with response:
+            response.encoding = response.encoding or 'utf-8'
+            try:
+                yield from iter_json_array(response.iter_content(STREAM_CHUNK_SIZE, decode_unicode=True))
+            except requests.exceptions.RequestException as e:
+                raise_compiler_error(f"{error_message}. Request failed with error: {e}")
+            except ValueError as e:
+                raise_compiler_error(f"{error_message}. Response is not a valid JSON array: {e}")
+
     def get_table(self, database: str, schema: str, table_name: str) -> Optional[dict]:
         return self._get_namespaces(
             database=database,
-            path=f"{schema}/tables/{table_name}",
+            schema=schema,
+            path=f"tables/{table_name}",
             error_message=f"Could not get table metadata for {database}.{schema}.{table_name}")
 
-    def _get_namespaces(self, database: str, path: str, error_message: str):
+    def invalidate(self, database: str, schema: str):
+        """Forget the cached metadata of a namespace, after a relation in it was created, dropped or renamed"""
+        self.cache.invalidate(database.lower(), schema.lower())
+        if self.store is not None:
+            self.store.invalidate(database.lower(), schema.lower())
+
+    def cache_stats(self) -> Dict[str, int]:
+        return self.cache.stats()
+
+    def _get_namespaces(self, database: str, schema: str, path: str, error_message: str):
+        key = (database.lower(), schema.lower(), path)
+        cached = self.cache.get(key)
+        if cached is not MISSING:
+            return cached
+
+        result = self._request(database, f"{schema}/{path}", error_message, key)
+        self.cache.put(key, result)
+        return result
+
+    def _send(self, database: str, path: str, error_message: str, stream: bool = False,
+              headers: Optional[Dict[str, str]] = None):
+        """GET `path` of the catalog's namespaces, returns None if the namespace or table doesn't exist"""
+        import requests
+
         try:
             namespaces = f"{self.credentials.scheme}://{self.credentials.host}:{self.credentials.port}/api/v1/domains/{self.credentials.domain}/schema/catalogs/{database}/namespaces"
 
-            response = self.session.get(f"{namespaces}/{path}", timeout=10,
-                                        headers={"X-API-TOKEN": self.credentials.token})
+            response = self.session.get(f"{namespaces}/{path}", timeout=10, stream=stream,
+                                        headers={"X-API-TOKEN": self.credentials.token, **(headers or {})})
             if response.status_code == 404:
+                response.close()
                 return None
 
             response.raise_for_status()
-            return json.loads(response.text)
+            return response
         except requests.exceptions.HTTPError as err:
             if err.response.text.__contains__("SCHEMA_NOT_FOUND"):      # TODO: fix the API response code
                 return None
@@ -47,3 +169,22 @@ class SchemaService:
             )
         except requests.exceptions.RequestException as e:
             raise_compiler_error(f"{error_message}. Request failed with error: {e}")
+
+    def _request(self, database: str, path: str, error_message: str, key: Tuple[str, str, str]):
+        headers = {}
+        stored = self.store.load(key) if self.store is not None else None
+        if stored is not None:
+            if stored['etag']:
+                headers["If-None-Match"] = stored['etag']
+            if stored['last_modified']:
+                headers["If-Modified-Since"] = stored['last_modified']
+
+        response = self._send(database, path, error_message, headers=headers)
+        if response is None:
+            return None
+        if response.status_code == 304 and stored is not None:
+            return json.loads(stored['body'])
+
+        if self.store is not None:
+            self.store.save(key, response.headers.get("ETag"), response.headers.get("Last-Modified"), response.text)
+        return json.loads(response.text)
@@ -0,0 +1,54 @@
+from typing import Iterator, List, Optional, Sequence
+
+import agate
+
+# rows whose rendered width is measured to estimate the size of an insert statement
+SAMPLE_ROWS = 1000
+
+
+def row_sql(column_types: List[str], binding_char: str = '%s') -> str:
+    """The placeholders of one row of `insert into ... values`"""
+    return "({})".format(",".join("cast({} as {})".format(binding_char, column_type) for column_type in column_types))
+
+
+def batch_size(agate_table: agate.Table, row_sql: str, target_bytes: int, max_rows: int) -> int:
+    """Rows per insert statement, so that a statement stays under `target_bytes` once the
+    values are bound, and has at most `max_rows` rows"""
+    rows = agate_table.rows
+    if not rows:
+        return max_rows
+    step = max(1, len(rows) // SAMPLE_ROWS)
+    sample = rows[::step]
+    # bound values are rendered as literals, strings quoted
+    value_bytes = sum(len(str(value)) + 2 if value is not None else 4 for row in sample for value in row)
+    row_bytes = len(row_sql) + 1 + value_bytes / len(sample)
+    return max(1, min(max_rows, int(target_bytes // row_bytes)))
+
+
+def batches(rows: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def insert_sql(relation, row_sql: str, row_count: int) -> str:
+    return "insert into {} values {}".format(relation.render(), ",".join([row_sql] * row_count))
+
+
+def bindings(chunk: Sequence) -> list:
+    values = []
+    for row in chunk:
+        values.extend(row)
+    return values
+
+
+def staging_table_sql(
+        staging, columns: List[str], column_types: List[str], file_format: Optional[str], location_root: Optional[str]
+) -> str:
+    """An empty table for the seed's rows, with its columns, file format and location"""
+    definitions = ", ".join("{} {}".format(column, column_type) for column, column_type in zip(columns, column_types))
+    sql = "create table {} ({})".format(staging.render(), definitions)
+    if file_format is not None:
+        sql += " using {}".format(file_format)
+    if location_root is not None:
+        sql += " location '{}/{}'".format(location_root, staging.identifier)
+    return sql
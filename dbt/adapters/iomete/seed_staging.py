@@ -0,0 +1,91 @@
+import re
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import agate
+import dbt.exceptions
+from dbt.events import AdapterLogger
+
+from dbt.adapters.iomete.connections import PyhiveConnectionWrapper
+
+logger = AdapterLogger("iomete")
+
+# Hadoop's names for S3, which pyarrow only knows as s3://
+HADOOP_S3_SCHEMES = re.compile(r'^s3[an]://')
+
+
+def _arrow_type(pyarrow, column_type: str):
+    """The pyarrow type a seed column is staged as, anything else is staged as text and cast by the insert"""
+    base = column_type.split('(')[0].strip().lower()
+    return {
+        'bigint': pyarrow.int64(),
+        'int': pyarrow.int32(),
+        'integer': pyarrow.int32(),
+        'double': pyarrow.float64(),
+        'float': pyarrow.float32(),
+        'boolean': pyarrow.bool_(),
+        'date': pyarrow.date32(),
+        'timestamp': pyarrow.timestamp('ms'),
+    }.get(base, pyarrow.string())
+
+
+def _arrow_value(pyarrow, arrow_type, value):
+    if value is None or pyarrow.types.is_temporal(arrow_type) or pyarrow.types.is_boolean(arrow_type):
+        return value
+    value = PyhiveConnectionWrapper._fix_binding(value)
+    return str(value) if pyarrow.types.is_string(arrow_type) else value
+
+
+def to_arrow_table(agate_table: agate.Table, column_types: List[str]):
+    """The seed as a pyarrow table, every column typed after its seed column type so that
+    the file's schema doesn't depend on the values (an all-null column would be `null` typed)"""
+    try:
+        import pyarrow
+    except ImportError:
+        raise dbt.exceptions.DbtRuntimeError(
+            "Staged seed loading requires pyarrow, install it with `pip install dbt-iomete[arrow]`"
+        )
+
+    arrays = []
+    for idx, column_type in enumerate(column_types):
+        arrow_type = _arrow_type(pyarrow, column_type)
+        values = [_arrow_value(pyarrow, arrow_type, row[idx]) for row in agate_table.rows]
+        arrays.append(pyarrow.array(values, type=arrow_type))
+    return pyarrow.Table.from_arrays(arrays, names=[str(name) for name in agate_table.column_names])
+
+
+@contextmanager
+def staged_parquet(agate_table: agate.Table, column_types: List[str], location: str, name: str) -> Iterator[str]:
+    """Writes the seed as a Parquet file under `location` and yields its URI, the file is deleted afterwards.
+
+    `location` is any URI pyarrow has a filesystem for (s3://, gs://, hdfs://,
+    a local path) and must be readable by the lakehouse under the same URI.
+    """
+    import pyarrow.fs
+    import pyarrow.parquet
+
+    table = to_arrow_table(agate_table, column_types)
+    filesystem, directory = pyarrow.fs.FileSystem.from_uri(HADOOP_S3_SCHEMES.sub('s3://', location))
+    filename = "{}-{}.parquet".format(name, uuid.uuid4().hex)
+    path = "{}/{}".format(directory.rstrip('/'), filename)
+
+    filesystem.create_dir(directory, recursive=True)
+    try:
+        # inside the try, a write that fails halfway still leaves an object behind
+        pyarrow.parquet.write_table(table, path, filesystem=filesystem)
+        yield "{}/{}".format(location.rstrip('/'), filename)
+    finally:
+        try:
+            filesystem.delete_file(path)
+        except OSError as exc:
+            logger.debug("Could not delete staged seed file {}: {}".format(path, exc))
+
+
+def insert_sql(relation, column_names: List[str], column_types: List[str], uri: str) -> str:
+    """`insert into ... select` from a staged Parquet file, casting every column to its seed type"""
+    columns = ", ".join(
+        "cast(`{}` as {})".format(str(name).replace('`', '``'), column_type)
+        for name, column_type in zip(column_names, column_types)
+    )
+    return "insert into {} select {} from parquet.`{}`".format(relation.render(), columns, uri)
@@ -0,0 +1,231 @@
+import atexit
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from dbt.events import AdapterLogger
+
+logger = AdapterLogger("Spark")
+
+# `set key = value` and `reset [key]`, possibly after the dbt query comment
+SET_STATEMENT = re.compile(
+    r'^\s*(?:/\*.*?\*/\s*|--[^\n]*\n\s*)*'
+    r'(?:set\s+(?P<key>[\w.\-]+)\s*=\s*(?P<value>.*?)|reset(?:\s+(?P<reset_key>[\w.\-]+))?)'
+    r'\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def parse_set_statement(sql: str) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+    """Returns ('set', key, value), ('reset', key or None, None), or None for other statements"""
+    match = SET_STATEMENT.match(sql)
+    if match is None:
+        return None
+    if match.group('key') is not None:
+        return 'set', match.group('key'), match.group('value')
+    return 'reset', match.group('reset_key'), None
+
+
+def conf_value(value: Any) -> str:
+    """`value` as it is written in a SET statement, booleans the way Spark prints them"""
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+class ThriftSession:
+    """An open Thrift session (pyhive connection) and its bookkeeping"""
+
+    def __init__(self, connection, conf: Optional[Dict[str, str]] = None):
+        self.connection = connection
+        self.created_at = time.time()
+        self.last_used_at = self.created_at
+        # Spark confs known to be in effect in this session, i.e. set on open or by a SET statement
+        self.conf: Dict[str, str] = dict(conf or {})
+
+    def is_redundant(self, sql: str) -> bool:
+        """True if `sql` sets a conf to the value it already has in this session"""
+        statement = parse_set_statement(sql)
+        return statement is not None and statement[0] == 'set' and self.conf.get(statement[1]) == statement[2]
+
+    def track(self, sql: str):
+        """Update the known confs after `sql` ran successfully"""
+        statement = parse_set_statement(sql)
+        if statement is None:
+            return
+        action, key, value = statement
+        if action == 'set':
+            self.conf[key] = value
+        elif key is not None:
+            self.conf.pop(key, None)
+        else:
+            # a bare RESET goes back to defaults we don't know
+            self.conf.clear()
+
+    def restore(self, conf: Dict[str, str]):
+        """Bring the session's confs back to `conf`: RESET the ones set since, SET the ones that changed"""
+        statements = ['reset {}'.format(key) for key in self.conf if key not in conf]
+        statements += ['set {} = {}'.format(key, value) for key, value in conf.items() if self.conf.get(key) != value]
+        if not statements:
+            return
+        cursor = self.connection.cursor()
+        try:
+            for sql in statements:
+                cursor.execute(sql)
+                self.track(sql)
+        finally:
+            cursor.close()
+
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    def idle_time(self) -> float:
+        return time.time() - self.last_used_at
+
+    def ping(self) -> bool:
+        """Cheap liveness probe: a GetInfo call doesn't start an operation on the lakehouse"""
+        from TCLIService.ttypes import TGetInfoReq, TGetInfoType, TStatusCode
+
+        try:
+            request = TGetInfoReq(
+                sessionHandle=self.connection.sessionHandle,
+                infoType=TGetInfoType.CLI_SERVER_NAME,
+            )
+            response = self.connection.client.GetInfo(request)
+            return response.status.statusCode == TStatusCode.SUCCESS_STATUS
+        except Exception as exc:
+            logger.debug("Session liveness probe failed: {}".format(exc))
+            return False
+
+    def close(self):
+        try:
+            self.connection.close()
+        except Exception as exc:
+            logger.debug("Exception while closing session: {}".format(exc))
+
+
+class SessionPool:
+    """Hands out open Thrift sessions to dbt threads and takes them back.
+
+    Idle sessions are validated with `ThriftSession.ping` before reuse when
+    they have been idle for `validate_after` seconds, and sessions older than
+    `max_age` seconds or released as broken are closed instead of pooled.
+    Released sessions get the confs they were opened with back.
+    """
+
+    def __init__(
+            self,
+            connect: Callable[[], Any],
+            size: int,
+            max_age: float = 3600,
+            validate_after: float = 30,
+            conf: Optional[Dict[str, str]] = None,
+    ):
+        self._connect = connect
+        self.conf = conf
+        self.size = size
+        self.max_age = max_age
+        self.validate_after = validate_after
+        self._idle: List[ThriftSession] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._prefill_lock = threading.Lock()
+        self._prefilled = False
+
+    def prefill_once(self, count: int):
+        """Pre-open sessions the first time the pool is used, concurrent callers wait for it"""
+        with self._prefill_lock:
+            if not self._prefilled:
+                self._prefilled = True
+                self.prefill(count)
+
+    def prefill(self, count: int) -> int:
+        """Open up to `count` sessions concurrently, returns the number of idle sessions"""
+        with self._lock:
+            missing = min(count, self.size) - len(self._idle)
+        if missing > 0:
+            with ThreadPoolExecutor(max_workers=missing, thread_name_prefix="iomete-session") as tpe:
+                for future in [tpe.submit(self._open) for _ in range(missing)]:
+                    try:
+                        self.release(future.result())
+                    except Exception as exc:
+                        # acquire() opens (and reports on) its own session if none is idle
+                        logger.debug("Could not pre-open session: {}".format(exc))
+        with self._lock:
+            return len(self._idle)
+
+    def acquire(self) -> ThriftSession:
+        while True:
+            with self._lock:
+                session = self._idle.pop() if self._idle else None
+            if session is None:
+                return self._open()
+
+            if session.age() >= self.max_age:
+                logger.debug("Evicting session older than {} seconds".format(self.max_age))
+                session.close()
+                continue
+            if session.idle_time() >= self.validate_after and not session.ping():
+                logger.debug("Evicting session that failed the liveness probe")
+                session.close()
+                continue
+
+            session.last_used_at = time.time()
+            return session
+
+    def release(self, session: ThriftSession, broken: bool = False):
+        if not broken and session.age() < self.max_age:
+            # confs a model set (e.g. in a pre-hook) must not carry over to the next one
+            try:
+                session.restore(self.conf or {})
+            except Exception as exc:
+                logger.debug("Could not restore the confs of the session, closing it: {}".format(exc))
+                session.close()
+                return
+            with self._lock:
+                if not self._closed and len(self._idle) < self.size:
+                    session.last_used_at = time.time()
+                    self._idle.append(session)
+                    return
+        session.close()
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for session in idle:
+            session.close()
+
+    def _open(self) -> ThriftSession:
+        return ThriftSession(self._connect(), self.conf)
+
+
+_POOLS: Dict[Hashable, SessionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_session_pool(key: Hashable, create: Optional[Callable[[], SessionPool]] = None) -> Optional[SessionPool]:
+    """Returns the process-wide pool for `key`, so sessions outlive dbt connections and invocations.
+
+    Without `create`, returns None if there is no pool for `key` yet.
+    """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None and create is not None:
+            pool = _POOLS[key] = create()
+        return pool
+
+
+@atexit.register
+def close_session_pools():
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
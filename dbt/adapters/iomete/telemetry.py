@@ -0,0 +1,35 @@
+import threading
+
+from dbt.events import AdapterLogger
+
+logger = AdapterLogger("iomete")
+
+SENTRY_DSN = "https://a1424d21130340e4913bd8bc1b228c12@o1140336.ingest.sentry.io/4504214031695872"
+
+_initialized = False
+_lock = threading.Lock()
+
+
+def init_telemetry(sample_rate: float) -> bool:
+    """Report errors, and `sample_rate` of the transactions, to iomete.
+
+    Runs once per process, on the first adapter of a profile that enables
+    `telemetry`; sentry_sdk isn't imported before that.
+    """
+    global _initialized
+    with _lock:
+        if _initialized:
+            return True
+        try:
+            import sentry_sdk
+        except ImportError:
+            logger.debug("Telemetry is enabled but sentry_sdk is not installed")
+            return False
+
+        sentry_sdk.init(
+            dsn=SENTRY_DSN,
+            traces_sample_rate=sample_rate,
+            attach_stacktrace=True
+        )
+        _initialized = True
+        return True
@@ -100,6 +100,7 @@
 {%- endmacro -%}
 
 {% macro iomete__create_table_as(temporary, relation, compiled_code, language='sql') -%}
+  {% do adapter.mark_schema_changed(relation) %}
   {%- if language == 'sql' -%}
       {% if temporary -%}
         {{ create_temporary_view(relation, compiled_code) }}
@@ -136,6 +137,7 @@
 
 
 {% macro iomete__create_view_as(relation, sql) -%}
+  {% do adapter.mark_schema_changed(relation) %}
   create or replace view {{ relation }}
   {{ comment_clause() }}
   {{ tblproperties_clause() }}
@@ -147,12 +149,14 @@
   {%- call statement('create_schema') -%}
     create schema if not exists {{relation}}
   {% endcall %}
+  {% do adapter.cache_schema_created(relation) %}
 {% endmacro %}
 
 {% macro iomete__drop_schema(relation) -%}
   {%- call statement('drop_schema') -%}
     drop schema if exists {{ relation }} cascade
   {%- endcall -%}
+  {% do adapter.cache_schema_dropped(relation) %}
 {% endmacro %}
 
 {% macro describe_temp_view(relation) %}
@@ -179,6 +183,8 @@
 {%- endmacro %}
 
 {% macro iomete__rename_relation(from_relation, to_relation) -%}
+  {% do adapter.mark_schema_changed(from_relation) %}
+  {% do adapter.mark_schema_changed(to_relation) %}
   {% call statement('rename_relation') -%}
     {% if not from_relation.type %}
       {% do exceptions.DbtDatabaseError("Cannot rename a relation with a blank type: " ~ from_relation.identifier) %}
@@ -193,6 +199,7 @@
 {% endmacro %}
 
 {% macro iomete__drop_relation(relation) -%}
+  {% do adapter.mark_schema_changed(relation) %}
   {% call statement('drop_relation', auto_begin=False) -%}
     drop {{ relation.type }} if exists {{ relation }}
   {%- endcall %}
@@ -208,16 +215,24 @@
   {%- set raw_file_format = config.get('file_format', default='iceberg') -%}
   {% set is_iceberg_file_format = raw_file_format == 'iceberg' %}
 
+  {#-- every comment is a schema commit on the same table, concurrent ones can conflict on Iceberg,
+       so they run one at a time unless the model opts in with statement_concurrency --#}
+  {%- set concurrency = config.get('statement_concurrency') or 1 -%}
+
   {% if is_iceberg_file_format %}
-    {% for column_name in column_dict %}
-      {% set comment = column_dict[column_name]['description'] %}
-      {% set escaped_comment = comment | replace('\'', '\\\'') %}
-      {% set comment_query %}
-        alter table {{ relation }} change column 
-            {{ adapter.quote(column_name) if column_dict[column_name]['quote'] else column_name }}
-            comment '{{ escaped_comment }}';
-      {% endset %}
-      {% do run_query(comment_query) %}
+    {% for chunk in column_dict | batch(concurrency) %}
+      {% set operations = [] %}
+      {% for column_name in chunk %}
+        {% set comment = column_dict[column_name]['description'] %}
+        {% set escaped_comment = comment | replace('\'', '\\\'') %}
+        {% set comment_query %}
+          alter table {{ relation }} change column 
+              {{ adapter.quote(column_name) if column_dict[column_name]['quote'] else column_name }}
+              comment '{{ escaped_comment }}';
+        {% endset %}
+        {% do operations.append(adapter.submit_query(comment_query)) %}
+      {% endfor %}
+      {% do adapter.wait_all(operations) %}
     {% endfor %}
   {% endif %}
 {% endmacro %}
@@ -235,6 +250,7 @@
 
 
 {% macro iomete__alter_column_type(relation, column_name, new_column_type) -%}
+  {% do adapter.mark_schema_changed(relation) %}
   {% call statement('alter_column_type') %}
     alter table {{ relation }} alter column {{ column_name }} type {{ new_column_type }};
   {% endcall %}
@@ -242,6 +258,7 @@
 
 
 {% macro iomete__alter_relation_add_remove_columns(relation, add_columns, remove_columns) %}
+  {% do adapter.mark_schema_changed(relation) %}
   
   {% if remove_columns %}
         {% set sql -%}
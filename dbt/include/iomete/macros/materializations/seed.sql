@@ -14,52 +14,43 @@
 
 {% macro iomete__load_csv_rows(model, agate_table) %}
 
-  {% set batch_size = get_batch_size() %}
   {% set column_override = model['config'].get('column_types', {}) %}
+  {% set column_types = adapter.get_seed_column_types(agate_table, column_override) %}
 
-  {% set statements = [] %}
+  {% set staged_sql = adapter.load_seed_from_staging(this, agate_table, column_types) %}
+  {% if staged_sql %}
+    {{ return(staged_sql) }}
+  {% endif %}
 
-  {% for chunk in agate_table.rows | batch(batch_size) %}
-      {% set bindings = [] %}
+  {# batches sized to seed_batch_bytes, at most get_batch_size() rows each #}
+  {% set sql = adapter.insert_seed_rows(this, agate_table, column_types, get_batch_size()) %}
 
-      {% for row in chunk %}
-          {% do bindings.extend(row) %}
-      {% endfor %}
-
-      {% set sql %}
-          insert into {{ this.render() }} values
-          {% for row in chunk -%}
-              ({%- for col_name in agate_table.column_names -%}
-                  {%- set inferred_type = adapter.convert_type(agate_table, loop.index0) -%}
-                  {%- set type = column_override.get(col_name, inferred_type) -%}
-                    cast({{ get_binding_char() }} as {{type}})
-                  {%- if not loop.last%},{%- endif %}
-              {%- endfor -%})
-              {%- if not loop.last%},{%- endif %}
-          {%- endfor %}
-      {% endset %}
-
-      {% do adapter.add_query(sql, bindings=bindings, abridge_sql_log=True) %}
+  {# Return SQL so we can render it out into the compiled files #}
+  {{ return(sql) }}
+{% endmacro %}
 
-      {% if loop.index0 == 0 %}
-          {% do statements.append(sql) %}
-      {% endif %}
-  {% endfor %}
 
-  {# Return SQL so we can render it out into the compiled files #}
-  {{ return(statements[0]) }}
+{#-- with seed_parallelism, the rows are inserted into a staging table before the seed is reset,
+     returns the staging table, or none if load_csv_rows inserts them --#}
+{% macro stage_csv_rows(model, agate_table) %}
+  {% set column_override = model['config'].get('column_types', {}) %}
+  {% set column_types = adapter.get_seed_column_types(agate_table, column_override) %}
+  {% set staging_relation = adapter.stage_seed_rows(
+      this, agate_table, column_types, get_batch_size(), config.get('file_format'), config.get('location_root'),
+      model['config'].get('quote_columns', None)) %}
+  {{ return(staging_relation) }}
 {% endmacro %}
 
 
 {% macro iomete__create_csv_table(model, agate_table) %}
   {%- set column_override = model['config'].get('column_types', {}) -%}
+  {%- set column_types = adapter.get_seed_column_types(agate_table, column_override) -%}
   {%- set quote_seed_column = model['config'].get('quote_columns', None) -%}
 
   {% set sql %}
     create table {{ this.render() }} (
         {%- for col_name in agate_table.column_names -%}
-            {%- set inferred_type = adapter.convert_type(agate_table, loop.index0) -%}
-            {%- set type = column_override.get(col_name, inferred_type) -%}
+            {%- set type = column_types[loop.index0] -%}
             {%- set column_name = (col_name | string) -%}
             {{ adapter.quote_seed_column(column_name, quote_seed_column) }} {{ type }} {%- if not loop.last -%}, {%- endif -%}
         {%- endfor -%}
@@ -72,9 +63,98 @@
     {{ tblproperties_clause() }}
   {% endset %}
 
+  {% do adapter.mark_schema_changed(this) %}
   {% call statement('_') -%}
     {{ sql }}
   {%- endcall %}
 
   {{ return(sql) }}
 {% endmacro %}
+
+
+{#-- the default seed materialization, except that seeds whose CSV file and config are unchanged aren't reloaded,
+     and that with seed_parallelism the seed is only reset once all its rows are staged #}
+{% materialization seed, adapter='iomete' %}
+
+  {%- set identifier = model['alias'] -%}
+  {%- set full_refresh_mode = (should_full_refresh()) -%}
+
+  {%- set old_relation = adapter.get_relation(database=database, schema=schema, identifier=identifier) -%}
+
+  {%- set exists_as_table = (old_relation is not none and old_relation.is_table) -%}
+  {%- set exists_as_view = (old_relation is not none and old_relation.is_view) -%}
+
+  {%- set grant_config = config.get('grants') -%}
+  {%- set agate_table = load_agate_table() -%}
+  -- grab current tables grants config for comparison later on
+
+  {%- do store_result('agate_table', response='OK', agate_table=agate_table) -%}
+
+  {%- set seed_hash = adapter.get_seed_hash(model) -%}
+  {%- set unchanged = exists_as_table and not full_refresh_mode and seed_hash
+                      and adapter.get_table_properties(old_relation).get('dbt_seed_hash') == seed_hash -%}
+
+  {{ run_hooks(pre_hooks, inside_transaction=False) }}
+
+  -- `BEGIN` happens here:
+  {{ run_hooks(pre_hooks, inside_transaction=True) }}
+
+  {% if unchanged %}
+    {% call noop_statement('main', 'UNCHANGED', 'UNCHANGED', 0) %}
+      -- {{ this }} already holds this version of the seed ({{ seed_hash }})
+    {% endcall %}
+  {% else %}
+    -- build model
+    {% set create_table_sql = "" %}
+    {% if exists_as_view %}
+      {{ exceptions.raise_compiler_error("Cannot seed to '{}', it is a view".format(old_relation)) }}
+    {% endif %}
+    {% set staging_relation = stage_csv_rows(model, agate_table) %}
+    {% if exists_as_table %}
+      {% set create_table_sql = reset_csv_table(model, full_refresh_mode, old_relation, agate_table) %}
+    {% else %}
+      {% set create_table_sql = create_csv_table(model, agate_table) %}
+    {% endif %}
+
+    {% set code = 'CREATE' if full_refresh_mode else 'INSERT' %}
+    {% set rows_affected = (agate_table.rows | length) %}
+    {% if staging_relation %}
+      {% set sql = adapter.copy_seed_from_staging(this, staging_relation) %}
+    {% else %}
+      {% set sql = load_csv_rows(model, agate_table) %}
+    {% endif %}
+
+    {% call noop_statement('main', code ~ ' ' ~ rows_affected, code, rows_affected) %}
+      {{ get_csv_sql(create_table_sql, sql) }};
+    {% endcall %}
+
+    {# only once the rows are in, so a failed load is retried on the next run #}
+    {% if seed_hash %}
+      {% do adapter.mark_schema_changed(this) %}
+      {% call statement('seed_hash') %}
+        alter table {{ this.render() }} set tblproperties ('dbt_seed_hash' = '{{ seed_hash }}')
+      {% endcall %}
+    {% endif %}
+  {% endif %}
+
+  {% set target_relation = this.incorporate(type='table') %}
+
+  {% set should_revoke = should_revoke(old_relation, full_refresh_mode) %}
+  {% do apply_grants(target_relation, grant_config, should_revoke=should_revoke) %}
+
+  {% do persist_docs(target_relation, model) %}
+
+  {% if full_refresh_mode or not exists_as_table %}
+    {% do create_indexes(target_relation) %}
+  {% endif %}
+
+  {{ run_hooks(post_hooks, inside_transaction=True) }}
+
+  -- `COMMIT` happens here
+  {{ adapter.commit() }}
+
+  {{ run_hooks(post_hooks, inside_transaction=False) }}
+
+  {{ return({'relations': [target_relation]}) }}
+
+{% endmaterialization %}
@@ -56,6 +56,7 @@
 
 {% macro iomete__create_columns(relation, columns) %}
     {% if columns|length > 0 %}
+    {% do adapter.mark_schema_changed(relation) %}
     {% call statement() %}
       alter table {{ relation }} add columns (
         {% for column in columns %}
@@ -100,7 +101,7 @@
   {% endif %}
 
   {% if not adapter.check_schema_exists(model.database, model.schema) %}
-    {% do create_schema(model.database, model.schema) %}
+    {% do create_schema(api.Relation.create(database=model.database, schema=model.schema)) %}
   {% endif %}
 
   {%- if not target_relation.is_table -%}
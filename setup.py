@@ -79,6 +79,9 @@ setup(
         "sentry-sdk==2.20.0",
         "iomete-sdk==3.0.0"
     ],
+    extras_require={
+        "arrow": ["pyarrow>=8.0.0"],
+    },
     zip_safe=False,
     classifiers=[
         "Development Status :: 5 - Production/Stable",
@@ -0,0 +1,57 @@
+import unittest
+from unittest import mock
+
+from TCLIService.ttypes import TOperationState
+
+from dbt.adapters.iomete.connections import PyhiveConnectionWrapper, SparkConnectionManager
+from dbt.adapters.iomete.polling import PollingStrategy, StatementDurations
+from dbt.adapters.iomete.session_pool import ThriftSession
+from .utils import FakeCursor
+
+
+def _wrapper(cursor):
+    handle = mock.Mock()
+    handle.cursor.return_value = cursor
+    polling = PollingStrategy(initial_interval=0.01, durations=StatementDurations())
+    return PyhiveConnectionWrapper(ThriftSession(handle), polling).cursor()
+
+
+@mock.patch('dbt.adapters.iomete.connections.time.sleep')
+class TestAdapterResponse(unittest.TestCase):
+
+    def test_response_has_query_statistics(self, sleep):
+        states = [TOperationState.PENDING_STATE, TOperationState.RUNNING_STATE, TOperationState.FINISHED_STATE]
+        wrapper = _wrapper(FakeCursor(states, rows=[(1,), (2,), (3,)], description=[('id', 'INT_TYPE')]))
+        wrapper.execute("select id from t")
+        SparkConnectionManager.get_result_from_cursor(wrapper, None)
+
+        response = SparkConnectionManager.get_response(wrapper)
+
+        self.assertEqual(str(response), 'OK')
+        self.assertEqual(response.query_id, '0102ab')
+        self.assertEqual(response.poll_count, 3)
+        self.assertEqual(response.rows_fetched, 3)
+        self.assertGreaterEqual(response.queued_seconds, 0)
+        self.assertGreaterEqual(response.execution_seconds, 0)
+
+        fields = response.to_dict(omit_none=True)
+        for field in ('query_id', 'queued_seconds', 'execution_seconds', 'poll_count', 'rows_fetched'):
+            self.assertIn(field, fields)
+
+    def test_response_of_submitted_operation(self, sleep):
+        cursor = FakeCursor([TOperationState.FINISHED_STATE])
+        handle = mock.Mock()
+        handle.cursor.return_value = cursor
+        wrapper = PyhiveConnectionWrapper(ThriftSession(handle))
+
+        operation = wrapper.submit("select 1")
+        wrapper.wait_all([operation])
+        response = SparkConnectionManager.get_response(operation)
+
+        self.assertEqual(response.query_id, '0102ab')
+        self.assertEqual(response.poll_count, 1)
+        self.assertEqual(response.rows_fetched, 0)
+
+    def test_response_without_statement(self, sleep):
+        response = SparkConnectionManager.get_response(_wrapper(FakeCursor([])))
+        self.assertEqual(response.to_dict(omit_none=True), {'_message': 'OK'})
@@ -36,3 +36,40 @@ class TestSparkColumn(unittest.TestCase):
                 'stats:rows:value': 12345678
             }
         )
+
+    def test_parse_table_stats(self):
+        self.assertEqual(SparkColumn.parse_table_stats("1024 bytes, 10 rows"), {'bytes': 1024, 'rows': 10})
+        self.assertEqual(SparkColumn.parse_table_stats(None), {})
+
+    def test_convert_metadata_stats(self):
+        self.assertDictEqual(
+            SparkColumn.convert_metadata_stats({'files': 3}),
+            {
+                'stats:files:description': '',
+                'stats:files:include': True,
+                'stats:files:label': 'files',
+                'stats:files:value': 3
+            }
+        )
+
+    def test_normalize_metadata_type(self):
+        types = {
+            'long': 'bigint',
+            'decimal(10, 2)': 'decimal(10,2)',
+            'timestamp': 'timestamp_ntz',
+            'timestamptz': 'timestamp',
+            'fixed[16]': 'binary',
+            'struct<a: int, b: string>': 'struct<a:int,b:string>',
+            'list<struct<long: long, ts: timestamptz>>': 'array<struct<long:bigint,ts:timestamp>>',
+            'map<string, list<fixed[4]>>': 'map<string,array<binary>>',
+        }
+        for dtype, expected in types.items():
+            with self.subTest(dtype=dtype):
+                self.assertEqual(SparkColumn.normalize_metadata_type(dtype), expected)
+
+    def test_only_primitive_types_are_known_to_match_describe(self):
+        self.assertTrue(SparkColumn.is_primitive_type('timestamp_ntz'))
+        self.assertTrue(SparkColumn.is_primitive_type('decimal(10,2)'))
+        self.assertFalse(SparkColumn.is_primitive_type('struct<a:int>'))
+        self.assertFalse(SparkColumn.is_primitive_type('array<string>'))
+        self.assertFalse(SparkColumn.is_primitive_type('time'))
@@ -0,0 +1,137 @@
+import datetime
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from TCLIService import ttypes
+
+from dbt.adapters.iomete import columnar
+from dbt.adapters.iomete.connections import PyhiveConnectionWrapper, SparkConnectionManager
+from dbt.adapters.iomete.session_pool import ThriftSession
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+def _nulls(values):
+    bitmap = bytearray((len(values) + 7) // 8)
+    for idx, value in enumerate(values):
+        if value is None:
+            bitmap[idx // 8] |= 1 << (idx % 8)
+    return bytes(bitmap)
+
+
+def _column(field, values):
+    wrapper = {
+        'i32Val': ttypes.TI32Column,
+        'stringVal': ttypes.TStringColumn,
+        'boolVal': ttypes.TBoolColumn,
+    }[field]
+    filled = [0 if v is None and field != 'stringVal' else ('' if v is None else v) for v in values]
+    return ttypes.TColumn(**{field: wrapper(values=filled, nulls=_nulls(values))})
+
+
+def _response(columns):
+    return mock.Mock(
+        status=mock.Mock(statusCode=ttypes.TStatusCode.SUCCESS_STATUS),
+        results=mock.Mock(columns=columns),
+    )
+
+
+DESCRIPTION = [
+    ('id', 'INT_TYPE'), ('name', 'STRING_TYPE'), ('amount', 'DECIMAL_TYPE'),
+    ('created_at', 'TIMESTAMP_TYPE'), ('active', 'BOOLEAN_TYPE'),
+]
+
+
+def _batch(ids, names, amounts, timestamps, flags):
+    return [
+        _column('i32Val', ids),
+        _column('stringVal', names),
+        _column('stringVal', amounts),
+        _column('stringVal', timestamps),
+        _column('boolVal', flags),
+    ]
+
+
+def _cursor(batches):
+    cursor = mock.Mock(description=DESCRIPTION)
+    cursor._connection.client.FetchResults.side_effect = [_response(b) for b in batches] + [_response([])]
+    return cursor
+
+
+BATCHES = [
+    _batch([1, 2], ['a', None], ['1.50', None], ['2024-01-01 10:00:00.5', None], [True, None]),
+    _batch([3], ['null'], ['3'], ['2024-01-02 00:00:00'], [False]),
+]
+
+
+class TestColumnarFetch(unittest.TestCase):
+
+    def test_column_values_apply_the_null_bitmap(self):
+        values = [None if i % 3 == 0 else i for i in range(20)]
+        self.assertEqual(columnar.column_values(_column('i32Val', values)), values)
+
+    def test_fetch_columns(self):
+        cursor = _cursor(BATCHES)
+        result = columnar.fetch_columns(cursor, fetch_size=2)
+
+        self.assertEqual(result.column_names, ['id', 'name', 'amount', 'created_at', 'active'])
+        self.assertEqual(result.row_count, 3)
+        self.assertEqual(result.columns[0], [1, 2, 3])
+        self.assertEqual(result.columns[1], ['a', None, 'null'])
+        self.assertEqual(result.columns[2], [Decimal('1.50'), None, Decimal('3')])
+        self.assertEqual(result.columns[3][0], datetime.datetime(2024, 1, 1, 10, 0, 0, 500000))
+        self.assertEqual(cursor._connection.client.FetchResults.call_count, 3)
+
+    def test_fetch_columns_with_limit(self):
+        cursor = _cursor(BATCHES)
+        result = columnar.fetch_columns(cursor, fetch_size=1000, limit=1)
+
+        self.assertEqual(result.row_count, 1)
+        request = cursor._connection.client.FetchResults.call_args.args[0]
+        self.assertEqual(request.maxRows, 1)
+
+    def test_agate_table_uses_the_result_schema(self):
+        handle = mock.Mock()
+        handle.cursor.return_value = _cursor(BATCHES)
+        wrapper = PyhiveConnectionWrapper(ThriftSession(handle), columnar_results=True).cursor()
+
+        table = SparkConnectionManager.get_result_from_cursor(wrapper, None)
+
+        self.assertEqual(
+            [type(t).__name__ for t in table.column_types],
+            ['Number', 'Text', 'Number', 'ISODateTime', 'Boolean']
+        )
+        self.assertEqual(list(table.rows[0].values())[:3], [1, 'a', Decimal('1.50')])
+        # text is kept as is, like in dbt's row based path
+        self.assertEqual(table.rows[2]['name'], 'null')
+        self.assertIsNone(table.rows[1]['active'])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_arrow_table(self):
+        table = columnar.to_arrow_table(columnar.fetch_columns(_cursor(BATCHES), fetch_size=2))
+
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(table.column('id').to_pylist(), [1, 2, 3])
+        self.assertEqual(table.column('active').to_pylist(), [True, None, False])
+        self.assertEqual(str(table.schema.field('created_at').type), 'timestamp[us]')
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_arrow_result_deduplicates_column_names(self):
+        cursor = _cursor(BATCHES)
+        cursor.description = [('id', 'INT_TYPE'), ('name', 'STRING_TYPE'), ('id', 'STRING_TYPE'),
+                              ('created_at', 'TIMESTAMP_TYPE'), ('id', 'BOOLEAN_TYPE')]
+        handle = mock.Mock()
+        handle.cursor.return_value = cursor
+        wrapper = PyhiveConnectionWrapper(ThriftSession(handle), columnar_results=True).cursor()
+        manager = mock.Mock(_add_query_comment=lambda sql: sql, add_query=mock.Mock(return_value=(None, wrapper)),
+                            _result_column_names=SparkConnectionManager._result_column_names)
+
+        table = SparkConnectionManager.execute_arrow(manager, 'select ...')
+
+        # like the agate results of SparkConnectionManager.get_result_from_cursor
+        self.assertEqual(table.column_names, ['id', 'name', 'id_2', 'created_at', 'id_3'])
+        self.assertEqual(table.column('id_3').to_pylist(), [True, None, False])
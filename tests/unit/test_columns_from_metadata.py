@@ -0,0 +1,334 @@
+import time
+import unittest
+from unittest import mock
+
+import agate
+
+from dbt.adapters.iomete import SparkAdapter, SparkColumn
+from dbt.adapters.iomete import metadata_cache
+from .utils import PROJECT, config_from_parts_or_dicts, iomete_profile
+
+
+# DESCRIBE EXTENDED of the table the metadata below describes
+DESCRIBE_ROWS = [
+    ('id', 'bigint', None),
+    ('amount', 'decimal(10,2)', None),
+    ('created_at', 'timestamp_ntz', None),
+    ('checksum', 'binary', None),
+    ('dt', 'date', None),
+    ('', '', ''),
+    ('# Partition Information', '', ''),
+    ('# col_name', 'data_type', 'comment'),
+    ('dt', 'date', None),
+    ('', '', ''),
+    ('# Detailed Table Information', '', ''),
+    ('Name', 'spark_catalog.analytics.orders', ''),
+    ('Provider', 'iceberg', ''),
+]
+
+TABLE_FIELDS = [
+    {'name': 'id', 'type': 'long'},
+    {'name': 'amount', 'type': 'decimal(10, 2)'},
+    {'name': 'created_at', 'type': 'timestamp'},
+    {'name': 'checksum', 'type': 'fixed[16]'},
+    {'name': 'dt', 'type': 'date'},
+]
+
+
+def _describe_table():
+    return agate.Table(DESCRIBE_ROWS, ['col_name', 'data_type', 'comment'],
+                       [agate.Text(), agate.Text(), agate.Text()])
+
+
+class TestColumnsFromMetadata(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile()))
+        self.relation = self.adapter.Relation.create(
+            database='spark_catalog', schema='analytics', identifier='orders', type='table', provider='iceberg',
+            table_fields=TABLE_FIELDS,
+        )
+        patcher = mock.patch.object(self.adapter, 'execute_macro', return_value=_describe_table())
+        self.execute_macro = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _describe_columns(self):
+        return self.adapter.parse_describe_extended(self.relation, _describe_table())
+
+    @staticmethod
+    def _names_and_types(columns):
+        return [(column.name, column.dtype, column.column_index) for column in columns]
+
+    def test_metadata_columns_match_describe(self):
+        columns = self.adapter.get_columns_in_relation(self.relation)
+
+        self.assertEqual(self._names_and_types(columns), self._names_and_types(self._describe_columns()))
+        self.assertEqual(columns, self._describe_columns())
+        self.execute_macro.assert_not_called()
+
+    def test_columns_of_cached_relation(self):
+        self.adapter.cache.add(self.relation)
+        relation = self.adapter.Relation.create(database='spark_catalog', schema='Analytics', identifier='ORDERS')
+
+        columns = self.adapter.get_columns_in_relation(relation)
+
+        self.assertEqual([column.name for column in columns], ['id', 'amount', 'created_at', 'checksum', 'dt'])
+        self.execute_macro.assert_not_called()
+
+    def test_columns_of_uncached_relation_come_from_the_table_api(self):
+        relation = self.adapter.Relation.create(database='spark_catalog', schema='analytics', identifier='orders')
+        with mock.patch.object(self.adapter.schema_service, 'get_table', return_value={'provider': 'iceberg', 'columns': TABLE_FIELDS}):
+            columns = self.adapter.get_columns_in_relation(relation)
+
+        self.assertEqual(len(columns), 5)
+        self.execute_macro.assert_not_called()
+
+    def test_changed_relations_are_described(self):
+        self.adapter.mark_schema_changed(self.relation)
+
+        columns = self.adapter.get_columns_in_relation(self.relation)
+
+        self.assertEqual(columns, self._describe_columns())
+        self.execute_macro.assert_called_once()
+
+    def test_replaced_relations_are_described(self):
+        self.adapter.cache_added(self.relation)
+        self.adapter.get_columns_in_relation(self.relation)
+        self.execute_macro.assert_called_once()
+
+    def test_missing_metadata_is_described(self):
+        relation = self.adapter.Relation.create(database='spark_catalog', schema='analytics', identifier='orders')
+        with mock.patch.object(self.adapter.schema_service, 'get_table', return_value=None):
+            self.adapter.get_columns_in_relation(relation)
+        self.execute_macro.assert_called_once()
+
+    def test_nested_json_types_are_described(self):
+        relation = self.relation.incorporate(table_fields=[{'name': 'id', 'type': {'type': 'struct', 'fields': []}}])
+        self.adapter.get_columns_in_relation(relation)
+        self.execute_macro.assert_called_once()
+
+    def test_nested_types_are_described(self):
+        for idx, dtype in enumerate(('struct<a: int, b: string>', 'list<string>', 'map<string, long>')):
+            with self.subTest(dtype=dtype):
+                relation = self.relation.incorporate(
+                    path={'identifier': f'nested_{idx}'}, table_fields=TABLE_FIELDS + [{'name': 'nested', 'type': dtype}])
+                self.adapter.get_columns_in_relation(relation)
+                self.assertEqual(self.execute_macro.call_count, idx + 1)
+
+    def test_tables_of_other_formats_are_described(self):
+        # Spark's spelling, where timestamp has a zone
+        fields = [{'name': 'id', 'type': 'bigint'}, {'name': 'updated_at', 'type': 'timestamp'}]
+        self.execute_macro.return_value = agate.Table(
+            [('id', 'bigint', None), ('updated_at', 'timestamp', None)], ['col_name', 'data_type', 'comment'])
+        for provider in ('parquet', None):
+            with self.subTest(provider=provider):
+                relation = self.relation.incorporate(
+                    path={'identifier': f'events_{provider}'}, provider=provider, table_fields=fields)
+                columns = self.adapter.get_columns_in_relation(relation)
+                self.assertEqual([column.dtype for column in columns], ['bigint', 'timestamp'])
+        self.assertEqual(self.execute_macro.call_count, 2)
+
+    def test_temp_views_are_described(self):
+        relation = self.adapter.Relation.create(identifier='global_temp.orders__dbt_tmp', table_fields=TABLE_FIELDS)
+        self.execute_macro.return_value = agate.Table([('id', 'bigint', None)], ['col_name', 'data_type', 'comment'])
+
+        self.adapter.get_columns_in_relation(relation)
+
+        self.assertEqual(self.execute_macro.call_args.args[0], 'describe_temp_view')
+
+    def test_metadata_columns_can_be_disabled(self):
+        adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile(columns_from_metadata=False)))
+        with mock.patch.object(adapter, 'execute_macro', return_value=_describe_table()) as execute_macro:
+            adapter.get_columns_in_relation(self.relation)
+        execute_macro.assert_called_once()
+
+
+class TestMetadataCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile()))
+        listing = [
+            {'catalog': 'spark_catalog', 'namespace': 'analytics', 'name': 'orders', 'type': 'TABLE',
+             'provider': 'iceberg', 'owner': 'etl', 'columns': TABLE_FIELDS,
+             'statistics': {'sizeInBytes': 4096, 'rowCount': 100, 'numFiles': 4}},
+            {'catalog': 'spark_catalog', 'namespace': 'analytics', 'name': 'orders_view', 'type': 'VIEW',
+             'provider': None, 'owner': 'etl', 'columns': TABLE_FIELDS[:1]},
+            {'catalog': 'spark_catalog', 'namespace': 'analytics', 'name': 'legacy', 'type': 'TABLE',
+             'provider': 'parquet', 'owner': None, 'columns': []},
+        ]
+        self.adapter.schema_service.get_tables_by_namespace = mock.Mock(return_value=listing)
+        self.adapter.schema_service.get_table = mock.Mock(return_value=None)
+
+    def test_catalog_is_built_from_the_listing(self):
+        describe = agate.Table([('id', 'int', None)], ['col_name', 'data_type', 'comment'])
+        with mock.patch.object(self.adapter, 'execute_macro', return_value=describe) as execute_macro:
+            catalog = self.adapter._get_one_catalog(mock.Mock(database='spark_catalog'), {'analytics'}, None)
+
+        # the Iceberg table isn't described, the view and the table without column metadata are
+        described = [call.kwargs['kwargs']['relation'].identifier for call in execute_macro.call_args_list]
+        self.assertEqual(sorted(described), ['legacy', 'orders_view'])
+
+        rows = {(row['table_name'], row['column_name']): row for row in catalog.rows}
+        self.assertEqual(len(rows), 7)
+        orders_id = rows[('orders', 'id')]
+        self.assertEqual(orders_id['column_type'], 'bigint')
+        self.assertEqual(orders_id['table_owner'], 'etl')
+        self.assertEqual(orders_id['table_type'], 'table')
+        self.assertEqual(orders_id['stats:provider:value'], 'iceberg')
+        self.assertEqual(orders_id['stats:bytes:value'], 4096)
+        self.assertEqual(orders_id['stats:rows:value'], 100)
+        self.assertEqual(orders_id['stats:files:value'], 4)
+        self.assertEqual(rows[('orders_view', 'id')]['table_type'], 'view')
+        self.assertEqual(rows[('legacy', 'id')]['column_type'], 'int')
+
+    def test_described_tables_have_owner_and_statistics(self):
+        rows = DESCRIBE_ROWS + [('Owner', 'etl', ''), ('Statistics', '1024 bytes, 10 rows', '')]
+        describe = agate.Table(rows, ['col_name', 'data_type', 'comment'], [agate.Text(), agate.Text(), agate.Text()])
+        relation = self.adapter.Relation.create(database='spark_catalog', schema='analytics', identifier='legacy')
+
+        columns = self.adapter.parse_describe_extended(relation, describe)
+
+        self.assertEqual(len(columns), 5)
+        self.assertEqual(columns[0].table_owner, 'etl')
+        self.assertEqual(columns[0].table_stats['stats:bytes:value'], 1024)
+        self.assertEqual(columns[0].table_stats['stats:rows:value'], 10)
+
+
+class TestColumnCache(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile(columns_from_metadata=False)))
+        self.relation = self.adapter.Relation.create(
+            database='spark_catalog', schema='analytics', identifier='orders', type='table',
+        )
+        patcher = mock.patch.object(self.adapter, 'execute_macro', return_value=_describe_table())
+        self.execute_macro = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_relations_are_described_once(self):
+        for _ in range(3):
+            columns = self.adapter.get_columns_in_relation(self.relation)
+            columns.pop()
+
+        self.assertEqual(len(self.adapter.get_columns_in_relation(self.relation)), 5)
+        self.execute_macro.assert_called_once()
+        self.assertEqual(self.adapter.column_cache_stats(), {'hits': 3, 'describes_saved': 3, 'size': 1})
+
+    def test_schema_changes_invalidate_the_columns(self):
+        other = self.relation.incorporate(path={'identifier': 'customers'})
+        self.adapter.get_columns_in_relation(self.relation)
+        self.adapter.get_columns_in_relation(other)
+
+        self.adapter.mark_schema_changed(self.relation)
+        self.adapter.get_columns_in_relation(self.relation)
+        self.adapter.get_columns_in_relation(other)
+
+        self.assertEqual(self.execute_macro.call_count, 3)
+
+    def test_dropped_and_renamed_relations_are_described_again(self):
+        renamed = self.relation.incorporate(path={'identifier': 'orders_old'})
+        self.adapter.get_columns_in_relation(self.relation)
+        self.adapter.get_columns_in_relation(renamed)
+
+        self.adapter.cache_renamed(self.relation, renamed)
+        self.adapter.get_columns_in_relation(self.relation)
+        self.adapter.get_columns_in_relation(renamed)
+        self.assertEqual(self.execute_macro.call_count, 4)
+
+        self.adapter.cache_dropped(renamed)
+        self.adapter.get_columns_in_relation(renamed)
+        self.assertEqual(self.execute_macro.call_count, 5)
+
+    def test_metadata_lookups_are_not_counted_as_saved_describes(self):
+        adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile()))
+        relation = self.relation.incorporate(provider='iceberg', table_fields=TABLE_FIELDS)
+
+        adapter.get_columns_in_relation(relation)
+        adapter.get_columns_in_relation(relation)
+
+        self.assertEqual(adapter.column_cache_stats(), {'hits': 1, 'describes_saved': 0, 'size': 1})
+
+
+class TestDescribeExtended(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile()))
+        self.relation = self.adapter.Relation.create(
+            database='spark_catalog', schema='analytics', identifier='orders', type='table', table_fields=TABLE_FIELDS,
+        )
+        rows = DESCRIBE_ROWS + [
+            ('Owner', 'etl', ''),
+            ('Location', 's3a://lakehouse/analytics/orders', ''),
+            ('Table Properties', '[current-snapshot-id=42, format=iceberg/parquet, comment=orders, by day]', ''),
+        ]
+        self.describe = agate.Table(rows, ['col_name', 'data_type', 'comment'],
+                                    [agate.Text(), agate.Text(), agate.Text()])
+        patcher = mock.patch.object(self.adapter, 'execute_macro', return_value=self.describe)
+        self.execute_macro = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_table_information_is_attached_to_the_relation(self):
+        relation = self.adapter.describe_relation(self.relation)
+
+        self.assertEqual(relation.provider, 'iceberg')
+        self.assertTrue(relation.is_iceberg)
+        self.assertEqual(relation.owner, 'etl')
+        self.assertEqual(relation.location, 's3a://lakehouse/analytics/orders')
+        self.assertEqual(relation.partition_by, ['dt'])
+        self.assertEqual(relation.properties, {
+            'current-snapshot-id': '42', 'format': 'iceberg/parquet', 'comment': 'orders, by day',
+        })
+        self.assertEqual(relation.render(), self.relation.render())
+
+    def test_statistics_are_kept_in_one_form(self):
+        rows = list(self.describe.rows) + [('Statistics', '1024 bytes, 10 rows', '')]
+        self.execute_macro.return_value = agate.Table(rows, ['col_name', 'data_type', 'comment'])
+
+        relation = self.adapter.describe_relation(self.relation)
+        columns = self.adapter._get_columns_from_metadata(relation)
+
+        self.assertEqual(relation.table_stats, {'bytes': 1024, 'rows': 10})
+        self.assertEqual(columns[0].table_stats, SparkColumn.convert_table_stats('1024 bytes, 10 rows'))
+
+    def test_relations_are_described_once(self):
+        self.adapter.describe_relation(self.relation)
+        self.assertEqual(self.adapter.get_table_properties(self.relation)['format'], 'iceberg/parquet')
+        self.assertEqual(len(self.adapter.get_columns_in_relation(self.relation)), 5)
+        self.execute_macro.assert_called_once()
+
+        self.adapter.mark_schema_changed(self.relation)
+        self.adapter.get_table_properties(self.relation)
+        self.assertEqual(self.execute_macro.call_count, 2)
+
+    def test_iceberg_partition_transforms(self):
+        rows = [('id', 'bigint', None), ('ts', 'timestamp', None), ('', '', ''),
+                ('# Partitioning', '', ''), ('Part 0', 'days(ts)', ''), ('Part 1', 'bucket(16, id)', '')]
+        describe = agate.Table(rows, ['col_name', 'data_type', 'comment'], [agate.Text(), agate.Text(), agate.Text()])
+
+        columns, information = self.adapter._parse_describe_extended(self.relation, describe)
+
+        self.assertEqual([column.name for column in columns], ['id', 'ts'])
+        self.assertEqual(information['partition_by'], ['days(ts)', 'bucket(16, id)'])
+
+    def test_wide_tables_are_parsed_in_one_pass(self):
+        width = 2000
+        rows = [('col_{}'.format(idx), 'decimal(38,10)', None) for idx in range(width)]
+        rows += [('', '', ''), ('# Detailed Table Information', '', '')]
+        rows += [('Property {}'.format(idx), 'value', '') for idx in range(100)]
+        rows += [('Table Properties', '[' + ', '.join('p{}=v'.format(idx) for idx in range(500)) + ']', '')]
+        describe = agate.Table(rows, ['col_name', 'data_type', 'comment'], [agate.Text(), agate.Text(), agate.Text()])
+
+        started = time.perf_counter()
+        for _ in range(10):
+            columns, information = self.adapter._parse_describe_extended(self.relation, describe)
+        elapsed = (time.perf_counter() - started) / 10
+
+        self.assertEqual(len(columns), width)
+        self.assertEqual(columns[-1].column_index, width - 1)
+        self.assertEqual(len(information['properties']), 500)
+        # about 10ms here, the budget only catches going back to quadratic or per-row dict building
+        self.assertLess(elapsed, 0.5)
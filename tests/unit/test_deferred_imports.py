@@ -0,0 +1,54 @@
+import json
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from dbt.exceptions import DbtProfileError
+
+from dbt.adapters.iomete import SparkAdapter
+from dbt.adapters.iomete import telemetry
+from .utils import PROJECT, config_from_parts_or_dicts, iomete_profile
+
+# only needed once a statement runs, a python model is submitted or telemetry is enabled
+DEFERRED_MODULES = ['iomete_sdk', 'pyhive', 'sentry_sdk', 'TCLIService', 'thrift']
+
+
+class TestDeferredImports(unittest.TestCase):
+
+    def test_importing_the_adapter_defers_heavy_modules(self):
+        # a fresh interpreter, the test process has imported them already
+        script = (
+            "import json, sys\n"
+            "import dbt.adapters.iomete\n"
+            "print(json.dumps([name for name in {!r} if name in sys.modules]))\n"
+        ).format(DEFERRED_MODULES)
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(json.loads(output), [])
+
+
+class TestTelemetry(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(telemetry, '_initialized', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_telemetry_is_off_by_default(self):
+        with mock.patch('sentry_sdk.init') as init:
+            SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile()))
+        init.assert_not_called()
+
+    def test_telemetry_is_initialized_once_with_the_sample_rate(self):
+        with mock.patch('sentry_sdk.init') as init:
+            profile = iomete_profile(telemetry=True, telemetry_sample_rate=0.25)
+            SparkAdapter(config_from_parts_or_dicts(PROJECT, profile))
+            SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile(telemetry=True)))
+
+        init.assert_called_once()
+        self.assertEqual(init.call_args.kwargs['traces_sample_rate'], 0.25)
+
+    def test_sample_rate_is_validated(self):
+        with self.assertRaises(DbtProfileError):
+            config_from_parts_or_dicts(PROJECT, iomete_profile(telemetry=True, telemetry_sample_rate=2))
@@ -0,0 +1,59 @@
+import json
+import unittest
+from unittest import mock
+
+from dbt.adapters.iomete.json_stream import iter_json_array
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+VALUES = [
+    {'name': 'orders', 'columns': [{'name': 'id', 'type': 'bigint'}], 'comment': 'a "quoted" [, ] value'},
+    12345,
+    -1.5e10,
+    'plain string',
+    None,
+    True,
+    [],
+    {'nested': {'deep': [1, 2, {'x': 'é'}]}},
+]
+
+
+class TestIterJsonArray(unittest.TestCase):
+
+    def test_elements_split_across_chunks(self):
+        text = json.dumps(VALUES, indent=2)
+        for size in (1, 2, 3, 7, 64, len(text)):
+            with self.subTest(chunk_size=size):
+                self.assertEqual(list(iter_json_array(_chunks(text, size))), VALUES)
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_json_array([' [', ' ] '])), [])
+        self.assertEqual(list(iter_json_array([])), [])
+
+    def test_elements_are_yielded_before_the_end_is_read(self):
+        def chunks():
+            yield '[{"name": "a"}, '
+            raise AssertionError("read too far")
+
+        self.assertEqual(next(iter_json_array(chunks())), {'name': 'a'})
+
+    def test_invalid_documents(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array(['{"not": "an array"}']))
+        with self.assertRaises(ValueError):
+            list(iter_json_array(['[{"name": "a"}, {"na']))
+
+    def test_elements_are_decoded_once(self):
+        element = {'columns': [{'name': 'c{}'.format(i), 'comment': 'a \\ "b" ]}'} for i in range(200)]}
+        text = json.dumps([element, element])
+        with mock.patch.object(json.JSONDecoder, 'raw_decode', autospec=True,
+                               side_effect=json.JSONDecoder.raw_decode) as raw_decode:
+            self.assertEqual(list(iter_json_array(_chunks(text, 5))), [element, element])
+        # not once per chunk the element spans
+        self.assertEqual(raw_decode.call_count, 2)
+
+    def test_escapes_split_across_chunks(self):
+        self.assertEqual(list(iter_json_array(['["a\\', '"b", "c\\', '\\"]'])), ['a"b', 'c\\'])
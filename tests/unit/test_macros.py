@@ -15,7 +15,8 @@ class TestSparkMacros(unittest.TestCase):
             'validation': mock.Mock(),
             'model': mock.Mock(),
             'exceptions': mock.Mock(),
-            'config': mock.Mock()
+            'config': mock.Mock(),
+            'adapter': mock.Mock(),
         }
         self.default_context['config'].get = lambda key, default=None, **kwargs: self.config.get(key, default)
 
@@ -0,0 +1,163 @@
+import os
+import unittest
+from argparse import Namespace
+from types import SimpleNamespace
+from unittest import mock
+
+import dbt.exceptions
+from TCLIService.ttypes import TOperationState
+from dbt.clients.jinja import get_environment
+from dbt.flags import set_from_args
+
+from dbt.adapters.iomete.connections import PyhiveConnectionWrapper, ThriftState
+from dbt.adapters.iomete.polling import PollingStrategy, StatementDurations
+from dbt.adapters.iomete.session_pool import ThriftSession
+from .utils import FakeCursor
+
+
+RUNNING = TOperationState.RUNNING_STATE
+FINISHED = TOperationState.FINISHED_STATE
+ERROR = TOperationState.ERROR_STATE
+
+MACROS = os.path.join(os.path.dirname(__file__), '..', '..', 'dbt', 'include', 'iomete', 'macros')
+
+
+def _wrapper(cursors):
+    handle = mock.Mock()
+    handle.cursor.side_effect = cursors
+    polling = PollingStrategy(initial_interval=0.01, durations=StatementDurations())
+    return PyhiveConnectionWrapper(ThriftSession(handle), polling)
+
+
+class TestThriftState(unittest.TestCase):
+
+    def test_states_match_the_thrift_bindings(self):
+        self.assertEqual(ThriftState._VALUES_TO_NAMES, TOperationState._VALUES_TO_NAMES)
+
+
+@mock.patch('dbt.adapters.iomete.connections.time.sleep')
+class TestSubmittedOperations(unittest.TestCase):
+
+    def test_submit_does_not_wait(self, sleep):
+        cursor = FakeCursor([RUNNING, FINISHED])
+        wrapper = _wrapper([cursor])
+
+        operation = wrapper.submit("alter table t change column a comment 'x';")
+
+        self.assertEqual(cursor.sql, "alter table t change column a comment 'x'")
+        self.assertEqual(cursor.polls, 0)
+        self.assertFalse(operation.done)
+
+    def test_as_completed_yields_in_completion_order(self, sleep):
+        slow = FakeCursor([RUNNING, RUNNING, RUNNING, FINISHED])
+        fast = FakeCursor([RUNNING, FINISHED])
+        wrapper = _wrapper([slow, fast])
+        operations = [wrapper.submit("select 1"), wrapper.submit("select 2")]
+
+        completed = list(wrapper.as_completed(operations))
+
+        self.assertEqual([op.sql for op in completed], ["select 2", "select 1"])
+        # one sleep per round over all running operations
+        self.assertEqual(sleep.call_count, 3)
+
+    def test_wait_all_raises_and_cancels_the_rest(self, sleep):
+        failing = FakeCursor([ERROR], error_message="Column not found")
+        running = FakeCursor([RUNNING])
+        wrapper = _wrapper([failing, running])
+        operations = [wrapper.submit("select 1"), wrapper.submit("select 2")]
+
+        with self.assertRaisesRegex(dbt.exceptions.DbtDatabaseError, "Column not found"):
+            wrapper.wait_all(operations)
+        self.assertTrue(running.cancelled)
+
+    def test_finished_operations_are_closed(self, sleep):
+        finished = FakeCursor([FINISHED])
+        failing = FakeCursor([ERROR], error_message="Column not found")
+        wrapper = _wrapper([finished, failing])
+        operation = wrapper.wait_all([wrapper.submit("select 1")])[0]
+        with self.assertRaises(dbt.exceptions.DbtDatabaseError):
+            wrapper.wait_all([wrapper.submit("select 2")])
+
+        self.assertTrue(finished.closed)
+        self.assertTrue(failing.closed)
+        # they don't pile up on long lived connections
+        self.assertEqual(wrapper._operations, [])
+        self.assertEqual(operation.query_id, '0102ab')
+
+    def test_close_closes_submitted_operations(self, sleep):
+        cursor = FakeCursor([RUNNING])
+        wrapper = _wrapper([cursor])
+        wrapper.submit("select 1")
+
+        wrapper.close()
+
+        self.assertTrue(cursor.closed)
+
+    def test_cancel_cancels_every_running_operation(self, sleep):
+        submitted = FakeCursor([RUNNING])
+        finished = FakeCursor([FINISHED])
+        current = FakeCursor([RUNNING])
+        wrapper = _wrapper([submitted, finished, current])
+        wrapper.submit("select 1")
+        wrapper.wait_all([wrapper.submit("select 2")])
+        wrapper.cursor()
+        wrapper._start(wrapper._cursor, "select 3")
+
+        wrapper.cancel()
+
+        self.assertTrue(submitted.cancelled)
+        self.assertTrue(current.cancelled)
+        self.assertFalse(finished.cancelled)
+
+    @mock.patch('dbt.adapters.iomete.connections.time.time')
+    def test_query_timeout_cancels_the_statement(self, clock, sleep):
+        # every reading of the clock is 3 seconds later
+        clock.side_effect = (3 * tick for tick in range(100))
+        cursor = FakeCursor([RUNNING])
+        wrapper = _wrapper([cursor])
+        wrapper.query_timeout = 10
+
+        with self.assertRaisesRegex(dbt.exceptions.DbtDatabaseError, "query_timeout of 10s"):
+            wrapper.cursor().execute("select 1")
+        self.assertTrue(cursor.cancelled)
+
+    def test_query_timeout_limits_the_sleep(self, sleep):
+        cursor = FakeCursor([RUNNING, FINISHED])
+        wrapper = _wrapper([cursor])
+        wrapper.polling = PollingStrategy(initial_interval=60, durations=StatementDurations())
+        wrapper.query_timeout = 5
+
+        wrapper.cursor().execute("select 1")
+
+        self.assertLessEqual(sleep.call_args.args[0], 5)
+
+
+class TestColumnComments(unittest.TestCase):
+
+    def setUp(self):
+        # dbt's jinja environment reads the flags
+        set_from_args(Namespace(), None)
+
+    def _alter_column_comments(self, **config):
+        submitted, groups = [], []
+        adapter = SimpleNamespace(
+            submit_query=lambda sql: submitted.append(sql) or len(submitted),
+            wait_all=lambda handles: groups.append(handles),
+            quote=lambda name: f'`{name}`',
+        )
+        config = {'file_format': 'iceberg', **config}
+        context = {'adapter': adapter, 'config': SimpleNamespace(get=lambda key, default=None: config.get(key, default))}
+        with open(os.path.join(MACROS, 'adapters.sql')) as adapters_sql:
+            template = get_environment().from_string(adapters_sql.read(), globals=context)
+        columns = {name: {'description': f'{name} column', 'quote': False} for name in ('a', 'b', 'c')}
+        template.module.dbt_macro__iomete__alter_column_comment('analytics.orders', columns)
+        return submitted, groups
+
+    def test_comments_are_committed_one_at_a_time(self):
+        submitted, groups = self._alter_column_comments()
+        self.assertEqual(len(submitted), 3)
+        self.assertEqual(groups, [[1], [2], [3]])
+
+    def test_concurrency_is_opt_in(self):
+        _, groups = self._alter_column_comments(statement_concurrency=2)
+        self.assertEqual(groups, [[1, 2], [3]])
@@ -0,0 +1,73 @@
+import itertools
+import unittest
+from unittest import mock
+
+from TCLIService.ttypes import TOperationState
+
+from dbt.adapters.iomete.connections import PyhiveConnectionWrapper
+from dbt.adapters.iomete.polling import PollingStrategy, StatementDurations
+from dbt.adapters.iomete.session_pool import ThriftSession
+from .utils import FakeCursor
+
+
+class TestPollingStrategy(unittest.TestCase):
+
+    def test_intervals_back_off_to_the_cap(self):
+        strategy = PollingStrategy(initial_interval=0.1, max_interval=1.0, backoff_factor=2.0)
+        intervals = list(itertools.islice(strategy.intervals(), 6))
+        self.assertEqual(intervals, [0.1, 0.2, 0.4, 0.8, 1.0, 1.0])
+
+    def test_adaptive_first_interval_follows_observed_durations(self):
+        durations = StatementDurations()
+        strategy = PollingStrategy(initial_interval=0.1, max_interval=5.0, adaptive=True, durations=durations)
+        self.assertEqual(strategy.first_interval(), 0.1)
+
+        for duration in (20.0, 30.0, 40.0):
+            strategy.record(duration)
+        self.assertEqual(strategy.first_interval(), 3.0)
+
+        for _ in range(10):
+            strategy.record(600.0)
+        self.assertEqual(strategy.first_interval(), 5.0)
+
+    def test_non_adaptive_strategy_ignores_durations(self):
+        durations = StatementDurations()
+        strategy = PollingStrategy(initial_interval=0.1, durations=durations)
+        strategy.record(100.0)
+        self.assertIsNone(durations.median())
+        self.assertEqual(strategy.first_interval(), 0.1)
+
+    def test_invalid_backoff_factor(self):
+        with self.assertRaises(ValueError):
+            PollingStrategy(backoff_factor=0.5)
+
+
+class TestPyhiveConnectionWrapperPolling(unittest.TestCase):
+
+    def _wrapper(self, cursor):
+        handle = mock.Mock()
+        handle.cursor.return_value = cursor
+        polling = PollingStrategy(initial_interval=0.01, max_interval=0.04, durations=StatementDurations())
+        return PyhiveConnectionWrapper(ThriftSession(handle), polling).cursor()
+
+    @mock.patch('dbt.adapters.iomete.connections.time.sleep')
+    def test_execute_counts_polls_and_backs_off(self, sleep):
+        cursor = FakeCursor([TOperationState.PENDING_STATE] * 2
+                            + [TOperationState.RUNNING_STATE] * 3
+                            + [TOperationState.FINISHED_STATE])
+        wrapper = self._wrapper(cursor)
+
+        wrapper.execute("select 1;")
+
+        self.assertEqual(cursor.sql, "select 1")
+        self.assertEqual(wrapper.poll_count, 6)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [0.01, 0.02, 0.04, 0.04, 0.04])
+
+    @mock.patch('dbt.adapters.iomete.connections.time.sleep')
+    def test_execute_does_not_sleep_for_fast_statements(self, sleep):
+        wrapper = self._wrapper(FakeCursor([TOperationState.FINISHED_STATE]))
+
+        wrapper.execute("select 1")
+
+        self.assertEqual(wrapper.poll_count, 1)
+        sleep.assert_not_called()
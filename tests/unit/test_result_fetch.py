@@ -0,0 +1,71 @@
+import unittest
+from unittest import mock
+
+from dbt.adapters.sql import SQLConnectionManager
+
+from dbt.adapters.iomete.connections import PyhiveConnectionWrapper, SparkConnectionManager
+from dbt.adapters.iomete.session_pool import ThriftSession
+
+
+class FakeResultCursor:
+    def __init__(self, description, rows):
+        self.description = description
+        self.rows = list(rows)
+        self.fetches = []
+
+    def fetchmany(self, size=None):
+        self.fetches.append(size)
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def fetchall(self):
+        return self.fetchmany(len(self.rows))
+
+
+def _wrapper(cursor, fetch_size=2):
+    handle = mock.Mock()
+    handle.cursor.return_value = cursor
+    return PyhiveConnectionWrapper(ThriftSession(handle), fetch_size=fetch_size).cursor()
+
+
+DESCRIPTION = [('id', 'INT_TYPE'), ('name', 'STRING_TYPE'), ('id', 'INT_TYPE')]
+ROWS = [(1, 'a', 10), (2, 'b', 20), (3, 'c', 30), (4, 'd', 40), (5, 'e', 50)]
+
+
+class TestStreamingFetch(unittest.TestCase):
+
+    def test_cursor_uses_the_fetch_size(self):
+        handle = mock.Mock()
+        PyhiveConnectionWrapper(ThriftSession(handle), fetch_size=500).cursor()
+        handle.cursor.assert_called_once_with(arraysize=500)
+
+    def test_iter_batches(self):
+        wrapper = _wrapper(FakeResultCursor(DESCRIPTION, ROWS))
+        self.assertEqual(
+            list(wrapper.iter_batches()),
+            [ROWS[0:2], ROWS[2:4], ROWS[4:5]]
+        )
+
+    def test_iteration_yields_rows(self):
+        wrapper = _wrapper(FakeResultCursor(DESCRIPTION, ROWS))
+        self.assertEqual(list(wrapper), ROWS)
+
+    def test_result_matches_the_default_implementation(self):
+        expected = SQLConnectionManager.get_result_from_cursor(FakeResultCursor(DESCRIPTION, ROWS), None)
+        actual = SparkConnectionManager.get_result_from_cursor(_wrapper(FakeResultCursor(DESCRIPTION, ROWS)), None)
+
+        self.assertEqual(actual.column_names, expected.column_names)
+        self.assertEqual(actual.column_names, ('id', 'name', 'id_2'))
+        self.assertEqual([type(t) for t in actual.column_types], [type(t) for t in expected.column_types])
+        self.assertEqual([r.values() for r in actual.rows], [r.values() for r in expected.rows])
+
+    def test_result_stops_fetching_at_the_limit(self):
+        cursor = FakeResultCursor(DESCRIPTION, ROWS)
+        table = SparkConnectionManager.get_result_from_cursor(_wrapper(cursor), 3)
+
+        self.assertEqual([r['name'] for r in table.rows], ['a', 'b', 'c'])
+        self.assertEqual(cursor.fetches, [2, 2])
+
+    def test_result_without_description(self):
+        table = SparkConnectionManager.get_result_from_cursor(_wrapper(FakeResultCursor(None, [])), None)
+        self.assertEqual(len(table.rows), 0)
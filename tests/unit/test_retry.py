@@ -0,0 +1,117 @@
+import unittest
+from unittest import mock
+
+import dbt.exceptions
+from TCLIService.ttypes import TOperationState
+from thrift.transport.TTransport import TTransportException
+
+from dbt.adapters.iomete import SparkAdapter
+from dbt.adapters.iomete.connections import SparkConnectionManager
+from dbt.adapters.iomete.retry import RetryPolicy, is_idempotent, retryable_reason
+from .utils import PROJECT, config_from_parts_or_dicts, iomete_profile
+
+
+def _connection(execute_errors=()):
+    connection = mock.Mock()
+    cursor = connection.cursor.return_value
+    cursor.execute.side_effect = list(execute_errors) + [None] * 10
+    cursor.poll.return_value = mock.Mock(operationState=TOperationState.FINISHED_STATE, errorMessage=None)
+    return connection
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_delays_grow_exponentially_up_to_the_cap(self):
+        policy = RetryPolicy(retries=5, base_delay=1, max_delay=10, random_uniform=lambda low, high: high)
+        self.assertEqual(list(policy.delays()), [1, 2, 4, 8, 10])
+
+    def test_delays_are_jittered(self):
+        policy = RetryPolicy(retries=50, base_delay=1, max_delay=10)
+        delays = list(policy.delays())
+        self.assertTrue(all(0 <= delay <= 10 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    def test_retryable_errors(self):
+        self.assertIsNotNone(retryable_reason(TTransportException(message="socket closed")))
+        self.assertIsNotNone(retryable_reason(ConnectionResetError()))
+        self.assertIsNotNone(retryable_reason(Exception("HTTP Error 503: Service Unavailable")))
+        self.assertIsNotNone(retryable_reason(Exception("Lakehouse is in pending state")))
+        self.assertIsNone(retryable_reason(Exception("Table or view not found: t; line 1 pos 14")))
+        self.assertIsNone(retryable_reason(Exception("Query exceeded query_timeout of 10s and was cancelled")))
+
+    def test_idempotent_statements(self):
+        self.assertTrue(is_idempotent("select 1"))
+        self.assertTrue(is_idempotent("/* {\"app\": \"dbt\"} */\n  describe extended t"))
+        self.assertTrue(is_idempotent("-- comment\n(with a as (select 1) select * from a)"))
+        self.assertTrue(is_idempotent("SHOW TBLPROPERTIES t"))
+        self.assertFalse(is_idempotent("create or replace table t as select 1"))
+        self.assertFalse(is_idempotent("insert into t select 1"))
+        self.assertFalse(is_idempotent("-- select\nmerge into t using s on t.id = s.id"))
+
+    def test_with_statements_are_idempotent_if_they_select(self):
+        self.assertTrue(is_idempotent("with a as (select 1), b (x) as (select ')' from a) select * from b"))
+        self.assertTrue(is_idempotent("with a as (select 1) (select * from a)"))
+        self.assertFalse(is_idempotent("with a as (select 1) insert into t select * from a"))
+        self.assertFalse(is_idempotent("WITH a AS (SELECT 1), b AS (SELECT 2)\nMERGE INTO t USING b ON t.id = b.id"))
+        self.assertFalse(is_idempotent("with a as (select 1) from a insert into t select *"))
+        self.assertFalse(is_idempotent("with a as (select 1"))
+
+
+@mock.patch('dbt.adapters.iomete.connections.time.sleep')
+class TestRetries(unittest.TestCase):
+
+    def _adapter(self, **settings):
+        return SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile(**settings)))
+
+    def test_open_retries_with_backoff(self, sleep):
+        adapter = self._adapter(connect_retries=3, connect_timeout=120)
+        errors = [TTransportException(message="HTTP 503"), TTransportException(message="HTTP 503")]
+        with mock.patch.object(SparkConnectionManager, '_connect', side_effect=errors + [_connection()]):
+            with adapter.connection_named('test'):
+                adapter.connections.get_thread_connection().handle
+
+        self.assertEqual(sleep.call_count, 2)
+        self.assertTrue(all(delay <= 2 for delay in [call.args[0] for call in sleep.call_args_list]))
+
+    def test_open_gives_up_after_the_retries(self, sleep):
+        adapter = self._adapter(connect_retries=2)
+        with mock.patch.object(SparkConnectionManager, '_connect', side_effect=TTransportException(message="HTTP 503")):
+            with adapter.connection_named('test'):
+                with self.assertRaises(TTransportException):
+                    adapter.connections.get_thread_connection().handle
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_idempotent_statements_are_retried_on_a_new_session(self, sleep):
+        adapter = self._adapter(query_retries=2)
+        first, second = _connection([TTransportException(message="socket closed")]), _connection()
+        with mock.patch.object(SparkConnectionManager, '_connect', side_effect=[first, second]):
+            with adapter.connection_named('test'):
+                adapter.execute("describe extended analytics.t")
+
+        first.close.assert_called_once()
+        second.cursor.return_value.execute.assert_called_once()
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_confs_of_the_model_are_set_on_the_new_session(self, sleep):
+        adapter = self._adapter(query_retries=2)
+        first = _connection([None, TTransportException(message="socket closed")])
+        second = _connection()
+        with mock.patch.object(SparkConnectionManager, '_connect', side_effect=[first, second]):
+            with adapter.connection_named('test'):
+                adapter.execute("set spark.sql.shuffle.partitions = 800")
+                adapter.execute("describe extended analytics.t")
+
+        executed = [call.args[0] for call in second.cursor.return_value.execute.call_args_list]
+        self.assertEqual(executed[0], "set spark.sql.shuffle.partitions = 800")
+        self.assertIn("describe extended analytics.t", executed[1])
+
+    def test_non_idempotent_statements_are_not_retried(self, sleep):
+        adapter = self._adapter(query_retries=2)
+        connection = _connection([TTransportException(message="socket closed")])
+        with mock.patch.object(SparkConnectionManager, '_connect', return_value=connection):
+            with adapter.connection_named('test'):
+                with self.assertRaises(dbt.exceptions.DbtRuntimeError):
+                    adapter.execute("insert into analytics.t select 1")
+
+        connection.cursor.return_value.execute.assert_called_once()
+        sleep.assert_not_called()
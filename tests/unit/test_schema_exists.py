@@ -0,0 +1,48 @@
+import unittest
+from unittest import mock
+
+import agate
+
+from dbt.adapters.iomete import SparkAdapter
+from dbt.adapters.iomete import metadata_cache
+from .utils import PROJECT, config_from_parts_or_dicts, iomete_profile
+
+
+def _namespaces(*names):
+    return agate.Table([(name,) for name in names], ['namespace'])
+
+
+class TestCheckSchemaExists(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile()))
+        patcher = mock.patch.object(self.adapter, 'execute_macro', return_value=_namespaces('analytics', 'staging'))
+        self.execute_macro = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_namespaces_are_listed_once_per_catalog(self):
+        for _ in range(3):
+            self.assertTrue(self.adapter.check_schema_exists('spark_catalog', 'analytics'))
+        self.assertFalse(self.adapter.check_schema_exists('spark_catalog', 'snapshots'))
+        self.execute_macro.assert_called_once()
+
+        self.adapter.check_schema_exists('other_catalog', 'analytics')
+        self.assertEqual(self.execute_macro.call_count, 2)
+        self.assertEqual(self.execute_macro.call_args.kwargs['kwargs'], {'database': 'other_catalog'})
+
+    def test_created_and_dropped_schemas_update_the_cache(self):
+        self.adapter.check_schema_exists('spark_catalog', 'analytics')
+
+        self.adapter.cache_schema_created(self.adapter.Relation.create(database='spark_catalog', schema='snapshots'))
+        self.adapter.cache_schema_dropped(self.adapter.Relation.create(database='spark_catalog', schema='staging'))
+
+        self.assertTrue(self.adapter.check_schema_exists('spark_catalog', 'snapshots'))
+        self.assertFalse(self.adapter.check_schema_exists('spark_catalog', 'staging'))
+        self.execute_macro.assert_called_once()
+
+    def test_schema_created_before_the_listing_leaves_it_to_the_listing(self):
+        self.adapter.cache_schema_created(self.adapter.Relation.create(database='spark_catalog', schema='snapshots'))
+
+        self.assertFalse(self.adapter.check_schema_exists('spark_catalog', 'snapshots'))
+        self.execute_macro.assert_called_once()
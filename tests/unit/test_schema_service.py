@@ -0,0 +1,302 @@
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+from dbt.exceptions import CompilationError
+
+from dbt.adapters.iomete import SparkAdapter
+from dbt.adapters.iomete import metadata_cache
+from dbt.adapters.iomete.connections import SparkCredentials
+from dbt.adapters.iomete.metadata_cache import MISSING, MetadataCache, ResponseStore
+from dbt.adapters.iomete.schema_service import SchemaService, table_statistics
+from .utils import PROJECT, config_from_parts_or_dicts, iomete_profile
+
+
+TABLES = [{
+    'catalog': 'spark_catalog', 'namespace': 'analytics', 'name': 'orders', 'type': 'TABLE',
+    'provider': 'iceberg', 'columns': [{'name': 'id', 'type': 'bigint'}],
+}]
+
+
+def _response(body='[]', status_code=200):
+    return mock.Mock(status_code=status_code, text=body)
+
+
+class TestTableStatistics(unittest.TestCase):
+
+    def test_statistics_of_the_table(self):
+        table = dict(TABLES[0], sizeInBytes=1024, rowCount='10', numFiles=2, lastModified=1700000000000)
+        self.assertEqual(table_statistics(table), {
+            'bytes': 1024, 'rows': 10, 'files': 2, 'last_modified': '2023-11-14T22:13:20+00:00',
+        })
+
+    def test_statistics_of_the_snapshot_summary(self):
+        table = dict(TABLES[0], summary={'total-files-size': '2048', 'total-records': '5', 'total-data-files': '1'})
+        self.assertEqual(table_statistics(table), {'bytes': 2048, 'rows': 5, 'files': 1})
+
+    def test_table_without_statistics(self):
+        self.assertEqual(table_statistics(dict(TABLES[0], rowCount='unknown')), {})
+
+
+class TestMetadataCache(unittest.TestCase):
+
+    def test_entries_expire_after_the_ttl(self):
+        now = [0.0]
+        cache = MetadataCache(max_size=10, ttl=60, clock=lambda: now[0])
+        cache.put(('c', 'n', 'tables'), [1])
+
+        now[0] = 59
+        self.assertEqual(cache.get(('c', 'n', 'tables')), [1])
+        now[0] = 61
+        self.assertIs(cache.get(('c', 'n', 'tables')), MISSING)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 0})
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = MetadataCache(max_size=2, ttl=60)
+        cache.put(('c', 'a', 'tables'), 'a')
+        cache.put(('c', 'b', 'tables'), 'b')
+        cache.get(('c', 'a', 'tables'))
+        cache.put(('c', 'c', 'tables'), 'c')
+
+        self.assertIs(cache.get(('c', 'b', 'tables')), MISSING)
+        self.assertEqual(cache.get(('c', 'a', 'tables')), 'a')
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_invalidate_drops_the_whole_namespace(self):
+        cache = MetadataCache()
+        cache.put(('c', 'a', 'tables'), 'tables')
+        cache.put(('c', 'a', 'tables/t'), 'table')
+        cache.put(('c', 'b', 'tables'), 'other')
+
+        cache.invalidate('c', 'a')
+
+        self.assertEqual(cache.stats()['size'], 1)
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = MetadataCache(ttl=0)
+        cache.put(('c', 'a', 'tables'), 'tables')
+        self.assertIs(cache.get(('c', 'a', 'tables')), MISSING)
+
+
+class TestSchemaServiceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile()))
+        self.service = self.adapter.schema_service
+        patcher = mock.patch.object(self.service.session, 'get', return_value=_response('[]'))
+        self.get = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_listings_are_cached(self):
+        self.service.get_tables_by_namespace('spark_catalog', 'analytics')
+        self.service.get_tables_by_namespace('SPARK_CATALOG', 'Analytics')
+
+        self.assertEqual(self.get.call_count, 1)
+        self.assertEqual(self.service.cache_stats()['hits'], 1)
+
+    def test_cache_stats_are_logged_on_cleanup(self):
+        self.service.get_tables_by_namespace('spark_catalog', 'analytics')
+        self.service.get_tables_by_namespace('spark_catalog', 'analytics')
+        with mock.patch('dbt.adapters.iomete.impl.logger') as logger:
+            self.adapter.cleanup_connections()
+
+        logger.debug.assert_called_once_with("Schema metadata cache: 1 hits, 1 misses, 0 evictions, 1 entries")
+
+    def test_not_found_is_cached(self):
+        self.get.return_value = _response(status_code=404)
+
+        self.assertIsNone(self.service.get_table('spark_catalog', 'analytics', 'missing'))
+        self.assertIsNone(self.service.get_table('spark_catalog', 'analytics', 'missing'))
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_cache_is_shared_by_adapters_of_the_process(self):
+        self.service.get_tables_by_namespace('spark_catalog', 'analytics')
+        other = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile()))
+
+        self.assertIs(other.schema_service.cache, self.service.cache)
+
+    def test_relation_changes_invalidate_the_namespace(self):
+        self.get.return_value = _response(json.dumps(TABLES))
+        relation = self.adapter.list_relations_without_caching(
+            self.adapter.Relation.create(database='spark_catalog', schema='analytics'))[0]
+
+        self.adapter.cache_dropped(relation)
+        self.adapter.list_relations_without_caching(
+            self.adapter.Relation.create(database='spark_catalog', schema='analytics'))
+
+        self.assertEqual(self.get.call_count, 2)
+
+
+class TestNamespacePrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile(metadata_concurrency=3)))
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def _get(self, url, **kwargs):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+        namespace = url.split('/namespaces/')[1].split('/')[0]
+        if namespace == 'empty':
+            return _response('[]')
+        return _response(json.dumps([dict(TABLES[0], namespace=namespace)]))
+
+    def test_namespaces_are_listed_concurrently_into_the_cache(self):
+        schemas = {self.adapter.Relation.create(database='spark_catalog', schema=f'ns_{i}') for i in range(6)}
+        schemas.add(self.adapter.Relation.create(database='spark_catalog', schema='empty'))
+
+        with mock.patch.object(self.adapter.schema_service.session, 'get', side_effect=self._get):
+            self.adapter.set_relations_cache(manifest=None, required_schemas=schemas)
+
+        self.assertEqual(self.max_running, 3)
+        self.assertIsNotNone(self.adapter.cache.get_relations('spark_catalog', 'ns_4'))
+        self.assertEqual(len(self.adapter.cache.get_relations('spark_catalog', 'ns_4')), 1)
+        self.assertIn(('spark_catalog', 'empty'), self.adapter.cache.schemas)
+
+
+class StubSchemaApi(BaseHTTPRequestHandler):
+    """Answers table listings with an ETag, and 304 when the client already has the current version"""
+    etag = '"v1"'
+    body = json.dumps(TABLES)
+    requests = []
+
+    def do_GET(self):
+        StubSchemaApi.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.headers.get('If-None-Match') == StubSchemaApi.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = StubSchemaApi.body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('ETag', StubSchemaApi.etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPersistentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.server = HTTPServer(('127.0.0.1', 0), StubSchemaApi)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        StubSchemaApi.requests = []
+        StubSchemaApi.etag = '"v1"'
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.credentials = SparkCredentials(
+            host='127.0.0.1', port=self.server.server_port, https=False, domain='default', lakehouse='dbt',
+            dataplane='dp', user='user1', token='abc123', schema='analytics',
+        )
+
+    def _invocation(self):
+        # every dbt invocation is a new process, without the in-memory cache
+        metadata_cache._CACHES.clear()
+        return SchemaService(self.credentials, cache_dir=self.cache_dir)
+
+    def test_unchanged_listing_is_revalidated(self):
+        first = self._invocation().get_tables_by_namespace('spark_catalog', 'analytics')
+        second = self._invocation().get_tables_by_namespace('spark_catalog', 'analytics')
+
+        self.assertEqual(first, TABLES)
+        self.assertEqual(second, TABLES)
+        self.assertEqual([etag for _, etag in StubSchemaApi.requests], [None, '"v1"'])
+
+    def test_changed_listing_is_downloaded(self):
+        self._invocation().get_tables_by_namespace('spark_catalog', 'analytics')
+        StubSchemaApi.etag = '"v2"'
+        self._invocation().get_tables_by_namespace('spark_catalog', 'analytics')
+        self._invocation().get_tables_by_namespace('spark_catalog', 'analytics')
+
+        self.assertEqual([etag for _, etag in StubSchemaApi.requests], [None, '"v1"', '"v2"'])
+
+    def test_invalidated_listing_is_downloaded(self):
+        service = self._invocation()
+        service.get_tables_by_namespace('spark_catalog', 'analytics')
+        service.invalidate('spark_catalog', 'analytics')
+        self._invocation().get_tables_by_namespace('spark_catalog', 'analytics')
+
+        self.assertEqual([etag for _, etag in StubSchemaApi.requests], [None, None])
+
+
+class TestResponseStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = ResponseStore(self.directory)
+
+    def test_body_is_stored_as_received(self):
+        body = json.dumps(TABLES, indent=2)
+        self.store.save(('c', 'n', 'tables'), '"v1"', None, body)
+
+        self.assertEqual(self.store.load(('c', 'n', 'tables')), {'etag': '"v1"', 'last_modified': None, 'body': body})
+        self.assertIsNone(self.store.load(('c', 'n', 'tables/orders')))
+
+    def test_invalidate_removes_the_namespace_without_reading_it(self):
+        self.store.save(('c', 'a', 'tables'), '"v1"', None, '[]')
+        self.store.save(('c', 'a', 'tables/t'), '"v1"', None, '{}')
+        self.store.save(('c', 'b', 'tables'), '"v1"', None, '[]')
+
+        with mock.patch('builtins.open', side_effect=AssertionError('read')):
+            self.store.invalidate('c', 'a')
+            self.store.invalidate('c', 'missing')
+
+        self.assertIsNone(self.store.load(('c', 'a', 'tables')))
+        self.assertIsNone(self.store.load(('c', 'a', 'tables/t')))
+        self.assertIsNotNone(self.store.load(('c', 'b', 'tables')))
+
+
+class TestStreamedListing(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.server = HTTPServer(('127.0.0.1', 0), StubSchemaApi)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.body = StubSchemaApi.body
+        self.addCleanup(setattr, StubSchemaApi, 'body', self.body)
+        StubSchemaApi.body = json.dumps([
+            dict(TABLES[0], name=f'table_{i}', provider='parquet' if i % 2 else 'iceberg') for i in range(500)
+        ])
+        StubSchemaApi.requests = []
+        profile = iomete_profile(host='127.0.0.1', port=self.server.server_port, https=False, metadata_streaming=True)
+        self.adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, profile))
+
+    def test_relations_are_built_from_the_streamed_listing(self):
+        relations = self.adapter.list_relations_without_caching(
+            self.adapter.Relation.create(database='spark_catalog', schema='analytics'))
+
+        self.assertEqual(len(relations), 500)
+        self.assertEqual(relations[1].identifier, 'table_1')
+        self.assertFalse(relations[1].is_iceberg)
+        self.assertEqual(relations[0].table_fields, [{'name': 'id', 'type': 'bigint'}])
+
+    def test_missing_namespace_has_no_tables(self):
+        with mock.patch.object(self.adapter.schema_service.session, 'get', return_value=_response(status_code=404)):
+            self.assertEqual(list(self.adapter.schema_service.iter_tables_by_namespace('spark_catalog', 'nope')), [])
+
+    def test_malformed_listing_is_a_compilation_error(self):
+        StubSchemaApi.body = '[{"name": "orders"}, {"name'
+        with self.assertRaises(CompilationError) as raised:
+            list(self.adapter.schema_service.iter_tables_by_namespace('spark_catalog', 'analytics'))
+        self.assertIn('Could not get tables for schema spark_catalog.analytics', str(raised.exception))
@@ -0,0 +1,349 @@
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import agate
+from dbt.clients.jinja import get_environment
+
+from dbt.adapters.iomete import SparkAdapter
+from dbt.adapters.iomete import metadata_cache, seed_batches
+from dbt.adapters.iomete.session_pool import close_session_pools
+from .utils import PROJECT, config_from_parts_or_dicts, iomete_profile
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+SEED_SQL = os.path.join(os.path.dirname(__file__), '..', '..', 'dbt', 'include', 'iomete', 'macros',
+                        'materializations', 'seed.sql')
+
+
+def _seed(rows=5):
+    return agate.Table(
+        [(idx, 'name {}'.format(idx), idx / 2) for idx in range(rows)],
+        ['id', 'name', 'score'],
+        [agate.Number(), agate.Text(), agate.Number()],
+    )
+
+
+class TestSeedColumnTypes(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile()))
+
+    def test_types_are_inferred_once_per_seed(self):
+        seed = _seed()
+        with mock.patch.object(SparkAdapter, 'convert_number_type', wraps=SparkAdapter.convert_number_type) as convert:
+            for _ in range(3):
+                self.assertEqual(self.adapter.get_seed_column_types(seed), ['bigint', 'string', 'double'])
+        self.assertEqual(convert.call_count, 2)
+
+    def test_overridden_columns_are_not_inferred(self):
+        with mock.patch.object(SparkAdapter, 'convert_number_type', wraps=SparkAdapter.convert_number_type) as convert:
+            types = self.adapter.get_seed_column_types(_seed(), {'score': 'decimal(10,1)'})
+        self.assertEqual(types, ['bigint', 'string', 'decimal(10,1)'])
+        convert.assert_called_once()
+
+
+class TestSeedMacros(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile()))
+        self.context = {
+            'adapter': self.adapter,
+            'this': mock.Mock(render=lambda: 'analytics.scores'),
+            'get_batch_size': lambda: 2,
+            'get_binding_char': lambda: '%s',
+            'config': SimpleNamespace(get=lambda key, default=None: default),
+            'return': lambda value: '',
+        }
+        # dbt's environment, it knows the materialization tag
+        with open(SEED_SQL) as seed_sql:
+            self.template = get_environment().from_string(seed_sql.read(), globals=self.context)
+
+    def test_rows_are_inserted_in_batches(self):
+        model = {'config': {'column_types': {'name': 'varchar(20)'}}}
+        with mock.patch.object(self.adapter.connections, 'add_query') as add_query:
+            self.template.module.dbt_macro__iomete__load_csv_rows(model, _seed())
+
+        self.assertEqual(add_query.call_count, 3)
+        sql = re.sub(r'\s+', ' ', add_query.call_args_list[0].args[0]).strip()
+        row = '(cast(%s as bigint),cast(%s as varchar(20)),cast(%s as double))'
+        self.assertEqual(sql, 'insert into analytics.scores values {},{}'.format(row, row))
+        self.assertEqual(add_query.call_args_list[0].kwargs['bindings'], [0, 'name 0', 0, 1, 'name 1', 0.5])
+        self.assertEqual(len(add_query.call_args_list[2].kwargs['bindings']), 3)
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestStagedSeeds(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.staging = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.staging)
+        profile = iomete_profile(seed_staging_location=self.staging)
+        self.adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, profile))
+        self.relation = self.adapter.Relation.create(database='spark_catalog', schema='analytics', identifier='scores')
+        self.staged = []
+
+    def _execute(self, sql):
+        # what the lakehouse would read
+        uri = re.search(r'parquet\.`(.*)`', sql).group(1)
+        self.staged.append((uri, pyarrow.parquet.read_table(uri)))
+
+    def test_seed_is_loaded_from_a_staged_file(self):
+        seed = _seed()
+        types = self.adapter.get_seed_column_types(seed)
+        with mock.patch.object(self.adapter.connections, 'execute', side_effect=self._execute) as execute:
+            sql = self.adapter.load_seed_from_staging(self.relation, seed, types)
+
+        execute.assert_called_once_with(sql)
+        uri, table = self.staged[0]
+        self.assertEqual(
+            sql,
+            "insert into spark_catalog.analytics.scores select cast(`id` as bigint), cast(`name` as string), "
+            "cast(`score` as double) from parquet.`{}`".format(uri)
+        )
+        self.assertEqual(table.column_names, ['id', 'name', 'score'])
+        self.assertEqual(table.column('score').to_pylist(), [0.0, 0.5, 1.0, 1.5, 2.0])
+        # cleaned up after the load
+        self.assertEqual(os.listdir(self.staging), [])
+
+    def test_staged_file_is_deleted_when_the_load_fails(self):
+        with mock.patch.object(self.adapter.connections, 'execute', side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self.adapter.load_seed_from_staging(self.relation, _seed(), ['bigint', 'string', 'double'])
+        self.assertEqual(os.listdir(self.staging), [])
+
+    def test_staged_columns_follow_the_seed_types(self):
+        seed = agate.Table([(1, None, None), (2, None, None)], ['id', 'name', 'score'],
+                           [agate.Number(), agate.Text(), agate.Number()])
+        with mock.patch.object(self.adapter.connections, 'execute', side_effect=self._execute):
+            self.adapter.load_seed_from_staging(self.relation, seed, ['bigint', 'string', 'double'])
+
+        _, table = self.staged[0]
+        # all-null columns aren't staged as Arrow's null type
+        self.assertEqual([str(field.type) for field in table.schema], ['int64', 'string', 'double'])
+        self.assertEqual(table.column('id').to_pylist(), [1, 2])
+
+    def test_partly_written_file_is_deleted(self):
+        def write_table(table, path, filesystem):
+            with filesystem.open_output_stream(path) as stream:
+                stream.write(b'PAR1')
+            raise OSError("connection reset")
+
+        with mock.patch.object(pyarrow.parquet, 'write_table', side_effect=write_table):
+            with self.assertRaises(OSError):
+                self.adapter.load_seed_from_staging(self.relation, _seed(), ['bigint', 'string', 'double'])
+        self.assertEqual(os.listdir(self.staging), [])
+
+    def test_seeds_are_inserted_without_a_staging_location(self):
+        adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile()))
+        self.assertEqual(adapter.load_seed_from_staging(self.relation, _seed(), ['bigint', 'string', 'double']), '')
+
+
+class TestSeedBatches(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.addCleanup(close_session_pools)
+
+    def _adapter(self, **settings):
+        adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile(**settings)))
+        relation = adapter.Relation.create(database='spark_catalog', schema='analytics', identifier='scores')
+        return adapter, relation
+
+    def test_batch_size_follows_the_width_of_the_rows(self):
+        narrow = agate.Table([(idx,) for idx in range(100)], ['id'], [agate.Number()])
+        wide = agate.Table([tuple('x' * 100 for _ in range(300))] * 100, ['c{}'.format(idx) for idx in range(300)])
+
+        narrow_size = seed_batches.batch_size(narrow, seed_batches.row_sql(['bigint']), 10000, 10000)
+        wide_row = seed_batches.row_sql(['string'] * 300)
+        wide_size = seed_batches.batch_size(wide, wide_row, 1000000, 10000)
+
+        self.assertGreater(narrow_size, 300)
+        self.assertEqual(wide_size, 27)
+        statement = seed_batches.insert_sql(mock.Mock(render=lambda: 't'), wide_row, wide_size)
+        self.assertLess(len(statement) + sum(102 for _ in range(300 * wide_size)), 1000000)
+
+    def test_batches_are_capped_by_the_batch_size(self):
+        adapter, relation = self._adapter()
+        with mock.patch.object(adapter.connections, 'add_query') as add_query:
+            adapter.insert_seed_rows(relation, _seed(), ['bigint', 'string', 'double'], 2)
+        self.assertEqual(add_query.call_count, 3)
+
+    def test_batches_are_loaded_concurrently_into_a_staging_table(self):
+        adapter, relation = self._adapter(seed_parallelism=4, seed_batch_bytes=200)
+        threads = set()
+
+        def add_query(sql, bindings=None, abridge_sql_log=False):
+            threads.add(threading.get_ident())
+            time.sleep(0.01)
+            self.assertIn('spark_catalog.analytics.scores__dbt_seed_staging values', sql)
+
+        with mock.patch.object(adapter.connections, 'add_query', side_effect=add_query) as batches, \
+                mock.patch.object(adapter.connections, 'execute') as execute, \
+                mock.patch.object(adapter, 'connection_named') as connection_named:
+            staging = adapter.stage_seed_rows(relation, _seed(40), ['bigint', 'string', 'double'], 10000,
+                                              'iceberg', 's3a://bucket/seeds')
+            adapter.copy_seed_from_staging(relation, staging)
+
+        self.assertGreater(batches.call_count, 4)
+        self.assertGreater(len(threads), 1)
+        self.assertNotIn(threading.get_ident(), threads)
+        # a connection per worker, not per batch
+        self.assertEqual(connection_named.call_count, 4)
+        self.assertEqual([call.args[0] for call in execute.call_args_list], [
+            'drop table if exists spark_catalog.analytics.scores__dbt_seed_staging',
+            "create table spark_catalog.analytics.scores__dbt_seed_staging (`id` bigint, `name` string, `score` double) "
+            "using iceberg location 's3a://bucket/seeds/scores__dbt_seed_staging'",
+            'insert into spark_catalog.analytics.scores select * from spark_catalog.analytics.scores__dbt_seed_staging',
+            'drop table if exists spark_catalog.analytics.scores__dbt_seed_staging',
+        ])
+
+    def test_seeds_are_not_staged_without_parallelism(self):
+        adapter, relation = self._adapter(seed_batch_bytes=200)
+        with mock.patch.object(adapter.connections, 'execute') as execute:
+            self.assertIsNone(adapter.stage_seed_rows(relation, _seed(40), ['bigint', 'string', 'double'], 10000))
+        execute.assert_not_called()
+
+
+class TestSeedHash(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(metadata_cache._CACHES.clear)
+        self.adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, iomete_profile()))
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.root, 'seeds'))
+        self._write('id,name\n1,a\n')
+        self.model = {
+            'alias': 'scores', 'root_path': self.root, 'original_file_path': 'seeds/scores.csv',
+            'config': {'column_types': {'id': 'int'}},
+        }
+        self.old_relation = self.adapter.Relation.create(
+            database='spark_catalog', schema='analytics', identifier='scores', type='table',
+        )
+
+    def _write(self, content):
+        with open(os.path.join(self.root, 'seeds', 'scores.csv'), 'w') as csv_file:
+            csv_file.write(content)
+
+    def _materialize(self, old_properties, full_refresh=False, stage_csv_rows=None):
+        calls = []
+
+        def noop_statement(name, message, code, rows_affected, caller=None):
+            calls.append(('noop_statement', message))
+            return ''
+
+        def statement(name, caller=None, **kwargs):
+            calls.append(('statement', re.sub(r'\s+', ' ', caller()).strip()))
+            return ''
+
+        def record(name, result=''):
+            return lambda *args, **kwargs: calls.append((name,)) or result
+
+        old_relation = self.old_relation.incorporate(properties=old_properties)
+        context = {
+            'adapter': self.adapter, 'model': self.model, 'config': {},
+            'this': self.old_relation, 'database': 'spark_catalog', 'schema': 'analytics',
+            'should_full_refresh': lambda: full_refresh, 'load_agate_table': lambda: _seed(),
+            'store_result': record('store_result'), 'run_hooks': record('run_hooks'), 'return': lambda value: '',
+            'noop_statement': noop_statement, 'statement': statement, 'exceptions': mock.Mock(),
+            'reset_csv_table': record('reset_csv_table'), 'create_csv_table': record('create_csv_table'),
+            'load_csv_rows': record('load_csv_rows'), 'get_csv_sql': record('get_csv_sql'),
+            'stage_csv_rows': stage_csv_rows or record('stage_csv_rows'), 'get_batch_size': lambda: 10000,
+            'should_revoke': record('should_revoke'), 'apply_grants': record('apply_grants'),
+            'persist_docs': record('persist_docs'), 'create_indexes': record('create_indexes'),
+        }
+        with open(SEED_SQL) as seed_sql:
+            template = get_environment().from_string(seed_sql.read(), globals=context)
+        # the template runs sandboxed, which refuses to call mocks
+        with mock.patch.object(self.adapter, 'get_relation', new=lambda **kwargs: old_relation), \
+                mock.patch.object(self.adapter, 'commit', new=lambda: None, create=True):
+            template.module.dbt_macro__materialization_seed_iomete()
+        return calls
+
+    def test_hash_covers_the_csv_and_the_config(self):
+        seed_hash = self.adapter.get_seed_hash(self.model)
+        self.assertEqual(seed_hash, self.adapter.get_seed_hash(self.model))
+
+        self.model['config']['column_types'] = {'id': 'bigint'}
+        config_hash = self.adapter.get_seed_hash(self.model)
+        self._write('id,name\n1,b\n')
+        content_hash = self.adapter.get_seed_hash(self.model)
+
+        self.assertEqual(len({seed_hash, config_hash, content_hash}), 3)
+
+    def test_missing_csv_has_no_hash(self):
+        self.model['original_file_path'] = 'seeds/missing.csv'
+        self.assertIsNone(self.adapter.get_seed_hash(self.model))
+
+    def test_unchanged_seed_is_not_reloaded(self):
+        calls = self._materialize({'dbt_seed_hash': self.adapter.get_seed_hash(self.model)})
+
+        self.assertIn(('noop_statement', 'UNCHANGED'), calls)
+        self.assertNotIn(('reset_csv_table',), calls)
+        self.assertNotIn(('load_csv_rows',), calls)
+
+    def test_changed_seed_is_reloaded_and_hashed(self):
+        calls = self._materialize({'dbt_seed_hash': 'outdated'})
+
+        self.assertIn(('reset_csv_table',), calls)
+        self.assertIn(('load_csv_rows',), calls)
+        self.assertIn(('noop_statement', 'INSERT 5'), calls)
+        self.assertIn(('statement', "alter table spark_catalog.analytics.scores set tblproperties "
+                                    "('dbt_seed_hash' = '{}')".format(self.adapter.get_seed_hash(self.model))), calls)
+
+    def test_full_refresh_reloads_unchanged_seeds(self):
+        calls = self._materialize({'dbt_seed_hash': self.adapter.get_seed_hash(self.model)}, full_refresh=True)
+        self.assertIn(('reset_csv_table',), calls)
+
+    def test_failed_batch_leaves_the_old_seed(self):
+        adapter = SparkAdapter(config_from_parts_or_dicts(
+            PROJECT, iomete_profile(seed_parallelism=4, seed_batch_bytes=100)))
+        self.adapter = adapter
+        executed = []
+
+        def stage_csv_rows(model, agate_table):
+            return adapter.stage_seed_rows(self.old_relation, agate_table, ['bigint', 'string', 'double'], 10000)
+
+        with mock.patch.object(adapter.connections, 'add_query', side_effect=[None, RuntimeError("boom")] + [None] * 40), \
+                mock.patch.object(adapter.connections, 'execute', side_effect=lambda sql: executed.append(sql)), \
+                mock.patch.object(adapter, 'connection_named'):
+            with self.assertRaises(RuntimeError):
+                self._materialize({'dbt_seed_hash': 'outdated'}, stage_csv_rows=stage_csv_rows)
+
+        # the seed was neither reset nor written to, only the staging table was
+        self.assertTrue(all('scores__dbt_seed_staging' in sql for sql in executed))
+        self.assertEqual(executed[-1], 'drop table if exists spark_catalog.analytics.scores__dbt_seed_staging')
+
+    def test_staged_rows_are_copied_after_the_reset(self):
+        staging = self.old_relation.incorporate(path={'identifier': 'scores__dbt_seed_staging'})
+        with mock.patch.object(self.adapter.connections, 'execute') as execute:
+            calls = self._materialize({'dbt_seed_hash': 'outdated'}, stage_csv_rows=lambda model, agate_table: staging)
+
+        self.assertIn(('reset_csv_table',), calls)
+        self.assertNotIn(('load_csv_rows',), calls)
+        self.assertEqual(execute.call_args_list[0].args[0], 'insert into spark_catalog.analytics.scores '
+                                                          'select * from spark_catalog.analytics.scores__dbt_seed_staging')
+
+    def test_seed_without_listed_properties_is_described(self):
+        describe = agate.Table(
+            [('id', 'int', None), ('', '', ''), ('# Detailed Table Information', '', ''),
+             ('Table Properties', '[dbt_seed_hash={}]'.format(self.adapter.get_seed_hash(self.model)), '')],
+            ['col_name', 'data_type', 'comment'], [agate.Text(), agate.Text(), agate.Text()],
+        )
+        with mock.patch.object(self.adapter, 'execute_macro', return_value=describe):
+            calls = self._materialize(None)
+        self.assertIn(('noop_statement', 'UNCHANGED'), calls)
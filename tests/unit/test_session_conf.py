@@ -0,0 +1,104 @@
+import unittest
+from unittest import mock
+
+from TCLIService.ttypes import TOperationState
+
+from dbt.adapters.iomete import SparkAdapter
+from dbt.adapters.iomete.connections import PyhiveConnectionWrapper, SparkConnectionManager
+from dbt.adapters.iomete.session_pool import ThriftSession, parse_set_statement
+from .utils import PROJECT, config_from_parts_or_dicts, iomete_profile
+
+PROFILE = iomete_profile(server_side_parameters={'spark.sql.shuffle.partitions': 200})
+
+
+def _connection():
+    connection = mock.Mock()
+    connection.cursor.return_value.poll.return_value = mock.Mock(
+        operationState=TOperationState.FINISHED_STATE, errorMessage=None)
+    connection.cursor.return_value.description = None
+    return connection
+
+
+def _executed(connection):
+    return [call.args[0] for call in connection.cursor.return_value.execute.call_args_list]
+
+
+class TestSessionConf(unittest.TestCase):
+
+    def test_parse_set_statement(self):
+        self.assertEqual(
+            parse_set_statement("/* {\"app\": \"dbt\"} */\n  set spark.sql.sources.partitionOverwriteMode = DYNAMIC"),
+            ('set', 'spark.sql.sources.partitionOverwriteMode', 'DYNAMIC'))
+        self.assertEqual(parse_set_statement("RESET spark.sql.shuffle.partitions;"),
+                         ('reset', 'spark.sql.shuffle.partitions', None))
+        self.assertEqual(parse_set_statement("reset"), ('reset', None, None))
+        self.assertIsNone(parse_set_statement("select 'set a = b'"))
+
+    def test_redundant_set_is_skipped(self):
+        connection = _connection()
+        wrapper = PyhiveConnectionWrapper(ThriftSession(connection))
+
+        wrapper.cursor().execute("set spark.sql.sources.partitionOverwriteMode = DYNAMIC")
+        wrapper.cursor().execute("set spark.sql.sources.partitionOverwriteMode = DYNAMIC")
+        wrapper.cursor().execute("reset spark.sql.sources.partitionOverwriteMode")
+        wrapper.cursor().execute("set spark.sql.sources.partitionOverwriteMode = DYNAMIC")
+
+        self.assertEqual(_executed(connection), [
+            "set spark.sql.sources.partitionOverwriteMode = DYNAMIC",
+            "reset spark.sql.sources.partitionOverwriteMode",
+            "set spark.sql.sources.partitionOverwriteMode = DYNAMIC",
+        ])
+
+    def test_failed_set_is_not_tracked(self):
+        connection = _connection()
+        connection.cursor.return_value.poll.return_value = mock.Mock(
+            operationState=TOperationState.ERROR_STATE, errorMessage="Cannot modify the value")
+        session = ThriftSession(connection)
+
+        with self.assertRaises(Exception):
+            PyhiveConnectionWrapper(session).cursor().execute("set spark.sql.warehouse.dir = /tmp")
+        self.assertEqual(session.conf, {})
+
+    def test_server_side_parameters_are_sent_on_open(self):
+        adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, PROFILE))
+        with mock.patch('pyhive.hive.connect', return_value=_connection()) as connect:
+            with adapter.connection_named('test'):
+                session = adapter.connections.get_thread_connection().handle.session
+
+        self.assertEqual(connect.call_args.kwargs['configuration'], {'spark.sql.shuffle.partitions': '200'})
+        self.assertEqual(session.conf, {'spark.sql.shuffle.partitions': '200'})
+
+    def test_model_spark_conf_is_applied_and_restored(self):
+        adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, PROFILE))
+        connection = _connection()
+        config = {'spark_conf': {'spark.sql.shuffle.partitions': 200, 'spark.sql.adaptive.enabled': True}}
+        with mock.patch.object(SparkConnectionManager, '_connect', return_value=connection):
+            with adapter.connection_named('test'):
+                context = adapter.pre_model_hook(config)
+                adapter.post_model_hook(config, context)
+
+        self.assertEqual(_executed(connection), [
+            "set spark.sql.adaptive.enabled = true",
+            "reset spark.sql.adaptive.enabled",
+        ])
+
+    def test_boolean_confs_are_spelled_like_spark_conf(self):
+        profile = iomete_profile(server_side_parameters={'spark.sql.adaptive.enabled': True})
+        adapter = SparkAdapter(config_from_parts_or_dicts(PROJECT, profile))
+        connection = _connection()
+        config = {'spark_conf': {'spark.sql.adaptive.enabled': True}}
+        with mock.patch.object(SparkConnectionManager, '_connect', return_value=connection):
+            with adapter.connection_named('test'):
+                context = adapter.pre_model_hook(config)
+                adapter.post_model_hook(config, context)
+
+        # already in effect from the profile, nothing to set or restore
+        self.assertEqual(_executed(connection), [])
+
+    def test_submitted_set_is_tracked(self):
+        session = ThriftSession(_connection())
+        wrapper = PyhiveConnectionWrapper(session)
+
+        wrapper.wait_all([wrapper.submit("set spark.sql.sources.partitionOverwriteMode = DYNAMIC")])
+
+        self.assertEqual(session.conf, {'spark.sql.sources.partitionOverwriteMode': 'DYNAMIC'})
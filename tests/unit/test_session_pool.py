@@ -0,0 +1,186 @@
+import unittest
+from unittest import mock
+
+from TCLIService.ttypes import TOperationState, TStatusCode
+
+from dbt.adapters.iomete import connections
+from dbt.adapters.iomete.connections import PyhiveConnectionWrapper, SparkConnectionManager, SparkCredentials
+from dbt.adapters.iomete.session_pool import SessionPool, ThriftSession, close_session_pools
+
+
+def _connection(alive=True):
+    connection = mock.Mock()
+    status = TStatusCode.SUCCESS_STATUS if alive else TStatusCode.ERROR_STATUS
+    connection.client.GetInfo.return_value = mock.Mock(status=mock.Mock(statusCode=status))
+    return connection
+
+
+class TestSessionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.opened = []
+
+        def connect():
+            connection = _connection()
+            self.opened.append(connection)
+            return connection
+
+        self.pool = SessionPool(connect=connect, size=2, max_age=3600, validate_after=30)
+
+    def test_prefill_opens_sessions_up_to_the_pool_size(self):
+        self.assertEqual(self.pool.prefill(5), 2)
+        self.assertEqual(len(self.opened), 2)
+
+        self.pool.prefill_once(2)
+        self.assertEqual(len(self.opened), 2)
+
+    def test_released_sessions_are_reused(self):
+        session = self.pool.acquire()
+        self.pool.release(session)
+
+        self.assertIs(self.pool.acquire(), session)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_surplus_sessions_are_closed_on_release(self):
+        sessions = [self.pool.acquire() for _ in range(3)]
+        for session in sessions:
+            self.pool.release(session)
+
+        self.assertEqual(self.pool.idle_count(), 2)
+        sessions[2].connection.close.assert_called_once()
+
+    def test_broken_sessions_are_not_pooled(self):
+        session = self.pool.acquire()
+        self.pool.release(session, broken=True)
+
+        self.assertEqual(self.pool.idle_count(), 0)
+        session.connection.close.assert_called_once()
+
+    def test_expired_sessions_are_evicted(self):
+        session = self.pool.acquire()
+        self.pool.release(session)
+        session.created_at -= 7200
+
+        self.assertIsNot(self.pool.acquire(), session)
+        session.connection.close.assert_called_once()
+
+    def test_idle_sessions_are_validated_before_reuse(self):
+        session = self.pool.acquire()
+        self.pool.release(session)
+        session.last_used_at -= 60
+        session.connection.client.GetInfo.return_value = mock.Mock(
+            status=mock.Mock(statusCode=TStatusCode.ERROR_STATUS))
+
+        self.assertIsNot(self.pool.acquire(), session)
+        session.connection.client.GetInfo.assert_called_once()
+        session.connection.close.assert_called_once()
+
+    def test_recently_used_sessions_skip_the_probe(self):
+        session = self.pool.acquire()
+        self.pool.release(session)
+
+        self.assertIs(self.pool.acquire(), session)
+        session.connection.client.GetInfo.assert_not_called()
+
+    def test_confs_of_a_model_are_not_seen_by_the_next(self):
+        pool = SessionPool(connect=_connection, size=1, conf={'spark.sql.shuffle.partitions': '200'})
+        model_a = pool.acquire()
+        model_a.track("set spark.sql.sources.partitionOverwriteMode = DYNAMIC")
+        model_a.track("set spark.sql.shuffle.partitions = 800")
+        pool.release(model_a)
+
+        model_b = pool.acquire()
+
+        self.assertIs(model_b, model_a)
+        self.assertEqual(model_b.conf, {'spark.sql.shuffle.partitions': '200'})
+        executed = [call.args[0] for call in model_b.connection.cursor.return_value.execute.call_args_list]
+        self.assertEqual(executed, ['reset spark.sql.sources.partitionOverwriteMode',
+                                    'set spark.sql.shuffle.partitions = 200'])
+
+    def test_sessions_whose_confs_cannot_be_restored_are_closed(self):
+        session = self.pool.acquire()
+        session.track("set spark.sql.sources.partitionOverwriteMode = DYNAMIC")
+        session.connection.cursor.return_value.execute.side_effect = RuntimeError("session lost")
+
+        self.pool.release(session)
+
+        self.assertEqual(self.pool.idle_count(), 0)
+        session.connection.close.assert_called_once()
+
+    def test_closed_pool_closes_released_sessions(self):
+        session = self.pool.acquire()
+        self.pool.close()
+        self.pool.release(session)
+
+        session.connection.close.assert_called_once()
+
+
+class TestPooledConnectionWrapper(unittest.TestCase):
+
+    def test_close_returns_the_session_to_the_pool(self):
+        pool = mock.Mock()
+        session = ThriftSession(_connection())
+        wrapper = PyhiveConnectionWrapper(session, pool=pool)
+
+        wrapper.close()
+
+        pool.release.assert_called_once_with(session, broken=False)
+        session.connection.close.assert_not_called()
+
+    def test_transport_errors_mark_the_session_broken(self):
+        pool = mock.Mock()
+        session = ThriftSession(_connection())
+        session.connection.cursor.return_value.execute.side_effect = EOFError()
+        wrapper = PyhiveConnectionWrapper(session, pool=pool).cursor()
+
+        with self.assertRaises(EOFError):
+            wrapper.execute("select 1")
+        wrapper.close()
+
+        pool.release.assert_called_once_with(session, broken=True)
+
+
+class TestWarmUp(unittest.TestCase):
+
+    def setUp(self):
+        self.creds = SparkCredentials(
+            host='dev.iomete.cloud', lakehouse='warmup', dataplane='dp', user='user', token='token',
+            schema='analytics', warmup=True, session_pool_size=3,
+        )
+        self.addCleanup(close_session_pools)
+
+    def _connect(self, creds):
+        connection = _connection()
+        connection.cursor.return_value.poll.return_value = mock.Mock(
+            operationState=TOperationState.FINISHED_STATE, errorMessage=None)
+        return connection
+
+    def test_warm_up_fills_the_pool_used_by_open(self):
+        with mock.patch.object(SparkConnectionManager, '_connect', side_effect=self._connect) as connect:
+            connections.warm_up(self.creds, threads=3)
+
+            pool = SparkConnectionManager.get_session_pool(self.creds)
+            self.assertIsNotNone(pool)
+            self.assertEqual(pool.idle_count(), 3)
+            self.assertEqual(connect.call_count, 3)
+            # the readiness probe ran on one of the pooled sessions
+            probed = [s for s in pool._idle if s.connection.cursor.return_value.execute.called]
+            self.assertEqual(len(probed), 1)
+            self.assertEqual(probed[0].connection.cursor.return_value.execute.call_args.args[0], "select 1")
+
+    def test_warm_up_failures_are_not_raised(self):
+        with mock.patch.object(SparkConnectionManager, '_connect', side_effect=EOFError()):
+            connections.warm_up(self.creds, threads=2)
+
+    def test_warm_up_without_a_session_pool(self):
+        creds = self.creds.replace(session_pool_size=0)
+        opened = []
+        with mock.patch.object(SparkConnectionManager, '_connect',
+                               side_effect=lambda creds: opened.append(self._connect(creds)) or opened[-1]):
+            connections.warm_up(creds, threads=3)
+
+        # the probe ran on a throwaway session, pooling stays off
+        self.assertIsNone(SparkConnectionManager.get_session_pool(creds))
+        self.assertEqual(len(opened), 1)
+        self.assertEqual(opened[0].cursor.return_value.execute.call_args.args[0], "select 1")
+        opened[0].close.assert_called_once()
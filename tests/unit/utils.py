@@ -113,6 +113,63 @@ def config_from_parts_or_dicts(project, profile, packages=None, selectors=None,
     )
 
 
+PROJECT = {
+    'name': 'X',
+    'version': '0.1',
+    'profile': 'test',
+    'project-root': '/tmp/dbt/does-not-exist',
+    'config-version': 2,
+}
+
+
+def iomete_profile(**settings):
+    """A profile whose `test` target is an iomete lakehouse, with `settings` added to the target"""
+    target = {
+        'type': 'iomete', 'host': 'iomete.com', 'dataplane': 'dp', 'domain': 'default', 'lakehouse': 'dbt',
+        'user': 'user1', 'token': 'abc123', 'port': 443, 'schema': 'analytics',
+    }
+    target.update(settings)
+    return {'outputs': {'test': target}, 'target': 'test'}
+
+
+class FakeCursor:
+    """A pyhive cursor whose asynchronous statement goes through `states`, one per poll,
+    staying in the last one, and returns `rows`"""
+
+    def __init__(self, states, error_message=None, rows=(), description=None):
+        self.states = list(states)
+        self.error_message = error_message
+        self.rows = list(rows)
+        self.description = description
+        self.polls = 0
+        self.cancelled = False
+        self.closed = False
+        self._operationHandle = mock.Mock(operationId=mock.Mock(guid=b'\x01\x02\xab'))
+
+    def execute(self, sql, bindings=None, async_=False):
+        self.sql = sql
+
+    def poll(self):
+        from TCLIService.ttypes import TOperationState
+
+        state = self.states[min(self.polls, len(self.states) - 1)]
+        self.polls += 1
+        error_message = self.error_message if state == TOperationState.ERROR_STATE else None
+        return mock.Mock(operationState=state, errorMessage=error_message)
+
+    def fetchmany(self, size=None):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def cancel(self):
+        self.cancelled = True
+
+    def close(self):
+        # like pyhive, which resets the cursor's state
+        self.closed = True
+        self._operationHandle = None
+
+
 def inject_plugin(plugin):
     from dbt.adapters.factory import FACTORY
     key = plugin.adapter.type()